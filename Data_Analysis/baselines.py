@@ -0,0 +1,156 @@
+"""Cheap longitude predictors to measure the network against.
+
+Every baseline has the walk_forward.py model interface, fit_predict(X_train,
+y_train, X_test, **params) -> (n_test, 2) (sin, cos), but takes raw features
+(latitude °, time_days, area µHem, duration days; see feature_store.FEATURES),
+so run them with walk_forward(..., standardize=False). All of them fit in a few
+array passes over the full catalog:
+
+- constant: the circular mean of the training longitudes
+- vonmises_bands: a mixture of von Mises distributions per latitude band,
+  fitted by EM for all bands at once; predicts the band's densest mode
+- knn: the circular mean of the k nearest training spots in (latitude, time)
+- ridge_fourier: ridge regression of (sin, cos) on latitude and Fourier terms of time
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from circular import angular_error, decode_longitude, error_summary
+from feature_store import load_features
+
+LATITUDE, TIME = 0, 1  # columns of the raw feature matrix
+# Synodic rotation, year (observing season), solar cycle and its double (Hale cycle), in days
+FOURIER_PERIODS = (27.2753, 365.25, 4018.0, 8036.0)
+
+
+def _as_sin_cos(angle):
+    return np.column_stack([np.sin(angle), np.cos(angle)]).astype(np.float32)
+
+
+def constant(X_train, y_train, X_test):
+    """Every test row gets the training set's circular mean longitude."""
+    mean = np.arctan2(y_train[:, 0].sum(), y_train[:, 1].sum())
+    return np.broadcast_to(_as_sin_cos(np.array([mean])), (len(X_test), 2))
+
+
+def _log_i0(kappa):
+    # log of the modified Bessel function I0; the asymptotic form avoids overflow for sharp peaks
+    big = kappa > 50
+    safe = np.where(big, 1.0, kappa)
+    return np.where(big, kappa - 0.5 * np.log(2 * np.pi * np.maximum(kappa, 1.0)), np.log(np.i0(safe)))
+
+
+def fit_von_mises_bands(theta, band, n_bands, n_components=3, iterations=25, seed=0):
+    """(weights, means, concentrations), each (n_bands, n_components), by EM batched over bands.
+
+    `theta` in radians; `band` in [0, n_bands). Concentrations use Banerjee's approximation.
+    """
+    rng = np.random.default_rng(seed)
+    K = n_components
+    mu = (2 * np.pi * np.arange(K) / K + rng.uniform(0, 2 * np.pi, (n_bands, 1))) % (2 * np.pi)
+    kappa = np.ones((n_bands, K))
+    weights = np.full((n_bands, K), 1 / K)
+    cell = (band[:, None] * K + np.arange(K)).ravel()
+    sin_t, cos_t = np.sin(theta)[:, None], np.cos(theta)[:, None]
+
+    for _ in range(iterations):
+        # E-step: κ·cos(θ - μ) = θ's (cos, sin) · κ(cos μ, sin μ), so only per-band tables are gathered
+        a, b = kappa * np.cos(mu), kappa * np.sin(mu)
+        log_p = (np.log(weights) - _log_i0(kappa))[band] + cos_t * a[band] + sin_t * b[band]
+        log_p -= log_p.max(axis=1, keepdims=True)
+        r = np.exp(log_p)
+        r /= r.sum(axis=1, keepdims=True)
+        # M-step: weighted circular moments per (band, component)
+        n = np.bincount(cell, r.ravel(), n_bands * K).reshape(n_bands, K) + 1e-9
+        s = np.bincount(cell, (r * sin_t).ravel(), n_bands * K).reshape(n_bands, K)
+        c = np.bincount(cell, (r * cos_t).ravel(), n_bands * K).reshape(n_bands, K)
+        weights = n / n.sum(axis=1, keepdims=True)
+        mu = np.arctan2(s, c) % (2 * np.pi)
+        r_bar = np.clip(np.hypot(s, c) / n, 1e-6, 0.999)
+        kappa = np.clip(r_bar * (2 - r_bar ** 2) / (1 - r_bar ** 2), 1e-3, 500)
+    return weights, mu, kappa
+
+
+def mixture_mode(weights, mu, kappa):
+    """Per band, the component mean where the mixture density is highest."""
+    # Density of every band's mixture evaluated at each of its own component means
+    log_terms = np.log(weights)[:, None, :] + kappa[:, None, :] * np.cos(mu[:, :, None] - mu[:, None, :]) \
+        - _log_i0(kappa)[:, None, :]
+    density = np.exp(log_terms).sum(axis=2)
+    return np.take_along_axis(mu, density.argmax(axis=1)[:, None], axis=1)[:, 0]
+
+
+def vonmises_bands(X_train, y_train, X_test, n_bands=16, n_components=3, max_rows=100_000, seed=0):
+    """Von Mises mixture per equal-count latitude band; each test row gets its band's densest mode."""
+    rng = np.random.default_rng(seed)
+    if len(X_train) > max_rows:
+        pick = rng.choice(len(X_train), max_rows, replace=False)
+        X_train, y_train = X_train[pick], y_train[pick]
+    latitude = X_train[:, LATITUDE]
+    edges = np.unique(np.quantile(latitude, np.linspace(0, 1, n_bands + 1)[1:-1]))
+    band = np.searchsorted(edges, latitude, side="right")
+    theta = np.arctan2(y_train[:, 0], y_train[:, 1])
+    weights, mu, kappa = fit_von_mises_bands(theta, band, len(edges) + 1, n_components, seed=seed)
+    mode = mixture_mode(weights, mu, kappa)
+    return _as_sin_cos(mode[np.searchsorted(edges, X_test[:, LATITUDE], side="right")])
+
+
+def knn(X_train, y_train, X_test, k=25, lat_scale=2.0, time_scale=27.2753):
+    """Circular mean of the k training spots nearest in latitude (`lat_scale` °) and time (`time_scale` days)."""
+    from scipy.spatial import cKDTree
+
+    scale = np.array([lat_scale, time_scale])
+    cols = [LATITUDE, TIME]
+    tree = cKDTree(X_train[:, cols] / scale)
+    _, idx = tree.query(X_test[:, cols] / scale, k=min(k, len(X_train)), workers=-1)
+    idx = idx.reshape(len(X_test), -1)
+    return y_train[idx].mean(axis=1).astype(np.float32)
+
+
+def fourier_design(X, periods=FOURIER_PERIODS, harmonics=2):
+    """Intercept, latitude terms and sin/cos of time at every period and harmonic."""
+    t = X[:, TIME].astype(np.float64)
+    lat = X[:, LATITUDE].astype(np.float64) / 90
+    columns = [np.ones_like(t), lat, np.abs(lat), lat ** 2]
+    for period in periods:
+        for h in range(1, harmonics + 1):
+            phase = 2 * np.pi * h * t / period
+            columns += [np.sin(phase), np.cos(phase)]
+    return np.column_stack(columns)
+
+
+def ridge_fourier(X_train, y_train, X_test, alpha=1.0, periods=FOURIER_PERIODS, harmonics=2):
+    """Ridge regression of (sin, cos) on fourier_design, solved in closed form (intercept unpenalized)."""
+    F = fourier_design(X_train, periods, harmonics)
+    penalty = alpha * np.eye(F.shape[1])
+    penalty[0, 0] = 0
+    coef = np.linalg.solve(F.T @ F + penalty, F.T @ y_train.astype(np.float64))
+    return (fourier_design(X_test, periods, harmonics) @ coef).astype(np.float32)
+
+
+BASELINES = {
+    "constant": constant,
+    "vonmises_bands": vonmises_bands,
+    "knn": knn,
+    "ridge_fourier": ridge_fourier,
+}
+
+
+def score_baselines(csv_path, groups=None, names=None):
+    """Fit every baseline on the feature store's train split and score it on the test split (degrees)."""
+    store = load_features(csv_path)
+    train, test = store.split("train", groups), store.split("test", groups)
+    X_train = store.inverse_transform(store["X"][train])
+    X_test = store.inverse_transform(store["X"][test])
+    y_train = np.asarray(store["y"][train])
+    true = np.asarray(store["longitude"][test])
+    rows = []
+    for name in names or BASELINES:
+        start = time.perf_counter()
+        pred = BASELINES[name](X_train, y_train, X_test)
+        seconds = time.perf_counter() - start
+        rows.append(dict(model=name, **error_summary(angular_error(true, decode_longitude(pred))),
+                         seconds=seconds))
+    return pd.DataFrame(rows)
@@ -0,0 +1,81 @@
+"""Startup-time report for the analysis modules (python -X importtime, summarised).
+
+    python bench_startup.py [--csv gpr_1874_1976_corrected.csv]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# What each CLI analysis has to import before it can do any work
+MODULES = {
+    "run_analysis (CLI)": "run_analysis",
+    "summary": "lifecycle",
+    "butterfly": "butterfly",
+    "regression": "linear_reg",
+    "significance": "resampling",
+    "cycles": "single_cycle_analysis",
+    "overlap": "overlapped_butterfly",
+    "longitude": "long_vs_time",
+    "heatmap": "3d_sun",
+    "density": "density_cube",
+    "hotspots": "sun_hotspots",
+    "predict": "long_prediction",
+    "predict (NumPy)": "mlp_runtime",
+    "walkforward": "walk_forward",
+    "search": "hyper_search",
+    "baselines": "baselines",
+}
+
+
+def import_profile(module):
+    """(total µs, [(cumulative µs, package)] of top-level imports) for importing `module` in a fresh interpreter."""
+    code = f"import importlib; importlib.import_module({module!r})"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=HERE, capture_output=True, text=True)
+    packages = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level ones add up to the total
+        if not name.startswith("  "):
+            packages.append((int(cumulative), name.strip()))
+    return sum(us for us, _ in packages), sorted(packages, reverse=True), proc.returncode
+
+
+def wall_time(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=HERE, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", default="gpr_1874_1976_corrected.csv",
+                        help="catalog for the end-to-end `summary` timing (skipped if missing)")
+    parser.add_argument("--top", type=int, default=3, help="heaviest imports listed per module")
+    args = parser.parse_args()
+
+    print(f"{'analysis':<20} {'import (s)':>10}  heaviest imports")
+    for label, module in MODULES.items():
+        total, packages, returncode = import_profile(module)
+        if returncode != 0:
+            print(f"{label:<20} {'failed':>10}  (missing dependency?)")
+            continue
+        heaviest = ", ".join(f"{name} {us / 1e6:.2f}s" for us, name in packages[:args.top])
+        print(f"{label:<20} {total / 1e6:>10.2f}  {heaviest}")
+
+    print()
+    print(f"{'run_analysis --help':<28} {wall_time(['run_analysis.py', '--help']):.2f}s wall")
+    if os.path.exists(os.path.join(HERE, args.csv)):
+        # First call may build the cache; time the warm run
+        wall_time(["run_analysis.py", "summary", "--csv", args.csv])
+        print(f"{'run_analysis summary':<28} {wall_time(['run_analysis.py', 'summary', '--csv', args.csv]):.2f}s wall (warm cache)")
+
+
+if __name__ == "__main__":
+    main()
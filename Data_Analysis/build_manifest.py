@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MANIFEST = "analysis/.build_manifest.json"
+
+
+def hash_inputs(*parts):
+    """Stable hex digest of data frames, arrays and JSON-serialisable parameters."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(str(part.dtype).encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        # Separator so ("ab", "c") and ("a", "bc") differ
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """Remembers the input hash each output file was built from, so unchanged figures can be skipped."""
+
+    def __init__(self, path=DEFAULT_MANIFEST):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, output, key, files=None):
+        """True if `output` was built from `key` and every file it produced (`files`, default just `output`) exists."""
+        return self.entries.get(output) == key and all(map(os.path.exists, files or [output]))
+
+    def record(self, output, key):
+        self.entries[output] = key
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
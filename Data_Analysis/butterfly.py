@@ -1,38 +1,50 @@
 #lat/time scatter plot
 
-import pandas as pd
 import matplotlib.pyplot as plt
-import numpy as np
-df=pd.read_csv("gpr_1874_1976_corrected.csv")
-year=df["year"].to_list()
-month=df["month"].to_list()
-day=df["day"].to_list()
-hour=df["hour"].to_list()
-minute=df["minute"].to_list()
-second=df["second"].to_list()
-area=df["area"].to_list()
-latitude=df["latitude"].to_list()
-x=[]
-lat=[]
-colors=[]
-for y,mo,d,h,mi,s,a,l in zip(year,month,day,hour,minute,second,area,latitude):
-    if a>=50:
-        time_val=y+mo/12+d/365+h/(24*365)+mi/(24*365*60)+s/(24*365*3600)
-        x.append(time_val)
-        lat.append(l)
-        colors.append(l)
-x = np.array(x)
-lat = np.array(lat)
-colors = np.array(colors)
-sizes = 5+15*(np.array(area)[:len(colors)]-50)/(max(area)-50)
-plt.figure(figsize=(12,6))
-scatter = plt.scatter(
-    x,lat,c=colors,s=sizes,
-    cmap='plasma',alpha=0.8,edgecolors='none'
-)
-plt.colorbar(scatter, label='Latitude')
-plt.title("Butterfly Diagram (Solar Cycle 1874-1976)")
-plt.xlabel("Year (fractional)")
-plt.ylabel("Latitude")
-plt.grid(alpha=0.3)
-plt.savefig("analysis/butterfly_diagram.png", dpi=300)
+from gpr_loader import load_gpr
+from butterfly_raster import butterfly_grid, draw_butterfly_raster, overlay_top_groups
+from figure_output import save_figure
+from time_axis import decimal_year
+
+
+def plot_butterfly_raster(df, out_path="analysis/butterfly_diagram.png", min_area=50, dpi=300,
+                          lifecycle=None, top_n=10, months=1, lat_step=1.0):
+    # Spots binned per month and degree: drawing cost no longer grows with the catalog
+    area_grid, _, t_edges, lat_edges = butterfly_grid(df, months=months, lat_step=lat_step, min_area=min_area)
+    fig, ax = plt.subplots(figsize=(12,6))
+    image = draw_butterfly_raster(ax, area_grid, t_edges, lat_edges, cmap='plasma')
+    fig.colorbar(image, ax=ax, label='Total area per bin (µHem)')
+    if lifecycle is not None and top_n:
+        overlay_top_groups(ax, lifecycle, top_n)
+        ax.legend(loc='upper right')
+    ax.set_title("Butterfly Diagram (Solar Cycle 1874-1976)")
+    ax.set_xlabel("Year (fractional)")
+    ax.set_ylabel("Latitude")
+    ax.grid(alpha=0.3)
+    save_figure(fig, out_path, dpi)
+
+
+def plot_butterfly(df, out_path="analysis/butterfly_diagram.png", min_area=50, dpi=300, raster=False, **raster_args):
+    if raster:
+        return plot_butterfly_raster(df, out_path, min_area=min_area, dpi=dpi, **raster_args)
+    df=df[df["area"]>=min_area]
+    x=decimal_year(df["date"])
+    lat=df["latitude"].to_numpy()
+    area=df["area"].to_numpy()
+    colors=lat
+    sizes = 5+15*(area-min_area)/(area.max()-min_area)
+    fig = plt.figure(figsize=(12,6))
+    scatter = plt.scatter(
+        x,lat,c=colors,s=sizes,
+        cmap='plasma',alpha=0.8,edgecolors='none'
+    )
+    plt.colorbar(scatter, label='Latitude')
+    plt.title("Butterfly Diagram (Solar Cycle 1874-1976)")
+    plt.xlabel("Year (fractional)")
+    plt.ylabel("Latitude")
+    plt.grid(alpha=0.3)
+    save_figure(fig, out_path, dpi)
+
+
+if __name__ == "__main__":
+    plot_butterfly(load_gpr("gpr_1874_1976_corrected.csv"))
@@ -0,0 +1,65 @@
+"""Binned butterfly diagrams: spots are summed into a time × latitude grid and drawn as one image,
+so drawing cost depends on the grid size rather than on the number of spots."""
+import numpy as np
+
+from time_axis import decimal_year
+
+
+def month_edges(start, end, months=1):
+    """Bin edges every `months` calendar months covering [start, end]."""
+    first = np.datetime64(start, "M")
+    last = np.datetime64(end, "M") + 1
+    edges = np.arange(first, last + months, months)
+    return edges[: np.searchsorted(edges, last) + 1]
+
+
+def butterfly_histogram(dates, latitude, area, t_edges, lat_edges):
+    """(area-weighted, count) grids of shape (time bins, latitude bins); out-of-range spots are dropped."""
+    t = np.asarray(dates, dtype="datetime64[s]")
+    lat = np.asarray(latitude, dtype=np.float64)
+    t_edges = np.asarray(t_edges, dtype="datetime64[s]")
+    lat_edges = np.asarray(lat_edges, dtype=np.float64)
+    n_t, n_lat = len(t_edges) - 1, len(lat_edges) - 1
+
+    ti = np.searchsorted(t_edges, t, side="right") - 1
+    li = np.searchsorted(lat_edges, lat, side="right") - 1
+    # The last edge is inclusive, like np.histogram
+    ti[t == t_edges[-1]] = n_t - 1
+    li[lat == lat_edges[-1]] = n_lat - 1
+    inside = (ti >= 0) & (ti < n_t) & (li >= 0) & (li < n_lat)
+    flat = ti[inside] * n_lat + li[inside]
+
+    weights = np.asarray(area, dtype=np.float64)[inside]
+    area_grid = np.bincount(flat, weights=weights, minlength=n_t * n_lat).reshape(n_t, n_lat)
+    count_grid = np.bincount(flat, minlength=n_t * n_lat).reshape(n_t, n_lat)
+    return area_grid, count_grid
+
+
+def butterfly_grid(df, months=1, lat_step=1.0, min_area=0, lat_range=(-50, 50)):
+    """Bin a catalog frame; returns (area grid, count grid, month edges, latitude edges)."""
+    spots = df[df["area"] >= min_area]
+    t_edges = month_edges(spots["date"].min(), spots["date"].max(), months)
+    lat_edges = np.arange(lat_range[0], lat_range[1] + lat_step, lat_step)
+    area_grid, count_grid = butterfly_histogram(
+        spots["date"].to_numpy(), spots["latitude"].to_numpy(), spots["area"].to_numpy(), t_edges, lat_edges)
+    return area_grid, count_grid, t_edges, lat_edges
+
+
+def draw_butterfly_raster(ax, grid, t_edges, lat_edges, cmap="plasma", log=True):
+    """Draw a binned grid on a fractional-year axis; empty bins stay transparent."""
+    from matplotlib.colors import LogNorm
+
+    x = decimal_year(t_edges)
+    image = np.ma.masked_less_equal(grid.T, 0)
+    norm = LogNorm(vmin=max(image.min(), 1e-3), vmax=image.max()) if log and image.count() else None
+    return ax.imshow(image, origin="lower", aspect="auto", interpolation="nearest", cmap=cmap, norm=norm,
+                     extent=(x[0], x[-1], lat_edges[0], lat_edges[-1]))
+
+
+def overlay_top_groups(ax, lifecycle, top_n=10, color="cyan"):
+    """Mark the peaks of the top-N groups by peak area on a raster butterfly."""
+    top = lifecycle.nlargest(top_n, "peak_area")
+    return ax.scatter(decimal_year(top["peak_date"]), top["peak_lat"],
+                      s=top["peak_area"] / top["peak_area"].max() * 120 + 20,
+                      facecolors="none", edgecolors=color, linewidths=1.2,
+                      label=f"Top {top_n} groups (peak)")
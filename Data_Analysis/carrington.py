@@ -0,0 +1,94 @@
+"""Carrington rotation numbers and a co-rotating longitude frame for the catalog.
+
+Catalog longitudes are Carrington longitudes, which turn with the Sun at the
+Carrington rate of 14.1844°/day (sidereal). Spots at other latitudes rotate at
+a different rate (differential rotation), so over many rotations a group's
+Carrington longitude drifts: faster near the equator, slower at high latitude.
+Subtracting that drift puts every latitude in its own co-rotating frame, where
+features that really stay put keep a constant longitude.
+
+    ω(φ) = A + B·sin²φ + C·sin⁴φ        (°/day, sidereal)
+    corotating_longitude = longitude − (ω(φ) − 14.1844)·(t − reference)   (mod 360)
+"""
+import numpy as np
+import pandas as pd
+
+from gpr_loader import DEFAULT_CSV, derived_table
+
+CARRINGTON_VERSION = 1
+
+CARRINGTON_RATE = 14.1844      # °/day, sidereal (360° / 25.38 days)
+SYNODIC_PERIOD = 27.2753       # days per Carrington rotation
+CR_EPOCH = (1690, 2444235.34)  # rotation 1690 began at this Julian date (1979-12-27)
+UNIX_EPOCH_JD = 2440587.5
+
+# (A, B, C) in °/day, sidereal
+ROTATION_MODELS = {
+    "snodgrass": (14.366, -2.297, -1.624),    # Snodgrass 1983, magnetic features
+    "newton_nunn": (14.38, -2.77, 0.0),       # Newton & Nunn 1951, recurrent sunspots
+    "carrington": (CARRINGTON_RATE, 0.0, 0.0),  # no correction
+}
+DEFAULT_MODEL = "snodgrass"
+DEFAULT_REFERENCE = "1900-01-01"
+
+
+def julian_date(dates):
+    """Julian dates (float64) of datetime64 values."""
+    seconds = np.asarray(dates, dtype="datetime64[s]").astype(np.int64)
+    return seconds / 86400.0 + UNIX_EPOCH_JD
+
+
+def carrington_rotation(dates):
+    """Fractional Carrington rotation number; the integer part is the rotation, the fraction how far into it."""
+    number, start_jd = CR_EPOCH
+    return number + (julian_date(dates) - start_jd) / SYNODIC_PERIOD
+
+
+def central_meridian_longitude(rotation):
+    """Carrington longitude facing Earth: 360° at the start of a rotation, falling to 0° at its end."""
+    return 360.0 * (1.0 - np.mod(rotation, 1.0))
+
+
+def rotation_rate(latitude, model=DEFAULT_MODEL):
+    """Sidereal angular velocity (°/day) at `latitude` (degrees)."""
+    a, b, c = ROTATION_MODELS[model]
+    s2 = np.sin(np.radians(np.asarray(latitude, dtype=np.float64))) ** 2
+    return a + s2 * (b + c * s2)
+
+
+def corotating_longitude(longitude, latitude, dates, model=DEFAULT_MODEL, reference=DEFAULT_REFERENCE):
+    """Carrington longitude minus the differential-rotation drift accumulated since `reference`."""
+    days = julian_date(dates) - julian_date(np.datetime64(pd.Timestamp(reference), "s"))
+    drift = (rotation_rate(latitude, model) - CARRINGTON_RATE) * days
+    return np.mod(np.asarray(longitude, dtype=np.float64) - drift, 360.0)
+
+
+def carrington_columns(df, model=DEFAULT_MODEL, reference=DEFAULT_REFERENCE):
+    """Row-aligned table of rotation, rotation_number, central_longitude, drift_rate and corotating_longitude."""
+    dates = df["date"].to_numpy()
+    latitude = df["latitude"].to_numpy(dtype=np.float64)
+    rotation = carrington_rotation(dates)
+    return pd.DataFrame({
+        "rotation": rotation,
+        "rotation_number": np.floor(rotation).astype(np.int32),
+        "central_longitude": central_meridian_longitude(rotation).astype(np.float32),
+        "drift_rate": (rotation_rate(latitude, model) - CARRINGTON_RATE).astype(np.float32),
+        "corotating_longitude": corotating_longitude(df["longitude"].to_numpy(), latitude, dates,
+                                                     model, reference).astype(np.float32),
+    })
+
+
+def load_carrington(csv_path=DEFAULT_CSV, model=DEFAULT_MODEL, reference=DEFAULT_REFERENCE, rebuild=False):
+    """carrington_columns for the whole catalog, cached with the dataset (rows in catalog order)."""
+    return derived_table("carrington", lambda df: carrington_columns(df, model, reference), csv_path,
+                         version=CARRINGTON_VERSION, rebuild=rebuild,
+                         params={"model": model, "reference": str(pd.Timestamp(reference))})
+
+
+def with_carrington(df, csv_path=DEFAULT_CSV, model=DEFAULT_MODEL, reference=DEFAULT_REFERENCE):
+    """The full catalog `df` (as loaded by load_gpr) with the cached Carrington columns added."""
+    extra = load_carrington(csv_path, model, reference)
+    if len(extra) != len(df):
+        raise ValueError("with_carrington needs the full catalog in cache order; "
+                         "use carrington_columns() for filtered frames")
+    return pd.concat([df, extra.set_axis(df.index)], axis=1)
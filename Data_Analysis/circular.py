@@ -0,0 +1,27 @@
+"""Angles on the circle: longitude decoding and errors that wrap at 360°."""
+import numpy as np
+
+
+def decode_longitude(sin_cos):
+    """Longitude in [0, 360) from (..., 2) predictions of (sin, cos); they need not be unit length."""
+    sin_cos = np.asarray(sin_cos, dtype=np.float64)
+    return np.degrees(np.arctan2(sin_cos[..., 0], sin_cos[..., 1])) % 360
+
+
+def angular_error(true_deg, pred_deg):
+    """Absolute difference in degrees the short way round, in [0, 180]."""
+    diff = (np.asarray(pred_deg, dtype=np.float64) - np.asarray(true_deg, dtype=np.float64)) % 360
+    return np.minimum(diff, 360 - diff)
+
+
+def error_summary(errors):
+    """n, mean, median and 90th percentile of angular errors (degrees). Random guessing averages 90°."""
+    errors = np.asarray(errors, dtype=np.float64)
+    if len(errors) == 0:
+        return {"n": 0, "mean_error": np.nan, "median_error": np.nan, "p90_error": np.nan}
+    return {
+        "n": len(errors),
+        "mean_error": errors.mean(),
+        "median_error": np.median(errors),
+        "p90_error": np.quantile(errors, 0.9),
+    }
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 13-month running mean with half-weight end months (the usual SIDC smoothing)
+SMOOTHING_KERNEL = np.r_[0.5, np.ones(11), 0.5] / 12
+
+
+def monthly_area(df):
+    """Mean daily sunspot area for every calendar month from the first to the last observation.
+
+    Days without any catalog entry count as spotless, so quiet months pull the mean down.
+    Returns (months as datetime64[M], mean daily area).
+    """
+    dates = df["date"].to_numpy().astype("datetime64[M]")
+    months = np.arange(dates.min(), dates.max() + 1)
+    index = (dates - months[0]).astype(np.int64)
+    total = np.bincount(index, weights=df["area"].to_numpy(dtype=np.float64), minlength=len(months))
+    days = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+    return months, total / days
+
+
+def smooth_13(values):
+    """13-month running mean; the six months at each end have no full window and are NaN."""
+    smoothed = np.convolve(values, SMOOTHING_KERNEL, mode="same")
+    smoothed[:6] = np.nan
+    smoothed[-6:] = np.nan
+    return smoothed
+
+
+def find_minima(smoothed, min_separation=84):
+    """Indices of months that are the lowest smoothed value within ±min_separation/2 months."""
+    half = min_separation // 2
+    padded = np.pad(smoothed, half, constant_values=np.nan)
+    windows = sliding_window_view(padded, 2 * half + 1)
+    with np.errstate(invalid="ignore"):
+        window_min = np.nanmin(np.where(np.isnan(windows), np.inf, windows), axis=1)
+        minima = np.flatnonzero(smoothed == window_min)
+    # Flat bottoms give several equal months; keep the first of each run
+    if len(minima):
+        minima = minima[np.r_[True, np.diff(minima) > half]]
+    return minima
+
+
+def detect_cycles(df, min_length_years=7):
+    """Solar cycles found from the smoothed monthly area, as (start, end) Timestamps.
+
+    Each cycle runs from one smoothed minimum month up to (not including) the next,
+    so only complete cycles inside the catalog are returned.
+    """
+    months, area = monthly_area(df)
+    minima = months[find_minima(smooth_13(area), int(min_length_years * 12))]
+    starts = pd.to_datetime(minima[:-1].astype("datetime64[D]"))
+    ends = pd.to_datetime(minima[1:].astype("datetime64[D]"))
+    return list(zip(starts, ends))
+
+
+def cycle_label(start, end):
+    return f"{start.year}-{end.year}"
+
+
+def cycle_phase(dates, cycles):
+    """Position of each date inside its cycle, in [0, 1), and the cycle's index; NaN and -1 outside every cycle."""
+    t = np.asarray(dates, dtype="datetime64[s]")
+    starts = np.array([start for start, _ in cycles], dtype="datetime64[s]")
+    ends = np.array([end for _, end in cycles], dtype="datetime64[s]")
+    k = np.searchsorted(starts, t, side="right") - 1
+    inside = k >= 0
+    k = np.clip(k, 0, None)
+    inside &= t < ends[k]
+    elapsed = (t - starts[k]).astype(np.float64)
+    length = (ends[k] - starts[k]).astype(np.float64)
+    return np.where(inside, elapsed / length, np.nan), np.where(inside, k, -1)
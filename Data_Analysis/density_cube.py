@@ -0,0 +1,137 @@
+"""Cycle phase × latitude × Carrington longitude histogram of the catalog, built once and memory-mapped.
+
+Heatmaps and "where is the activity" queries are then sums over slices of the
+cube instead of passes over every spot.
+"""
+import numpy as np
+
+from cycles import cycle_phase, detect_cycles
+from figure_output import save_figure
+from gpr_loader import DEFAULT_CSV, derived_arrays
+
+CUBE_VERSION = 1
+CHANNELS = ("area", "count")
+AXES = ("phase", "latitude", "longitude")
+
+
+def cube_edges(phase_bins=20, lat_step=2.0, lon_step=10.0, lat_range=(-50, 50)):
+    return {
+        "phase": np.linspace(0, 1, phase_bins + 1),
+        "latitude": np.arange(lat_range[0], lat_range[1] + lat_step, lat_step),
+        "longitude": np.arange(0, 360 + lon_step, lon_step),
+    }
+
+
+def build_density_cube(df, cycles=None, phase_bins=20, lat_step=2.0, lon_step=10.0, min_area=0):
+    """float32 array (channel, phase, latitude, longitude) with the channels in CHANNELS order.
+
+    Spots outside every detected cycle, outside the latitude range or without a
+    position are left out.
+    """
+    if cycles is None:
+        cycles = detect_cycles(df)
+    edges = cube_edges(phase_bins, lat_step, lon_step)
+    # NaN positions would cast to arbitrary bin indices
+    spots = df[(df["area"] >= min_area) & df["latitude"].notna() & df["longitude"].notna()]
+    phase, _ = cycle_phase(spots["date"].to_numpy(), cycles)
+    lat = spots["latitude"].to_numpy()
+    lon = np.mod(spots["longitude"].to_numpy(), 360)
+
+    shape = tuple(len(edges[axis]) - 1 for axis in AXES)
+    pi = np.floor(phase * shape[0])
+    li = np.searchsorted(edges["latitude"], lat, side="right") - 1
+    ni = np.minimum((lon // lon_step).astype(np.int64), shape[2] - 1)
+    keep = ~np.isnan(pi) & (li >= 0) & (li < shape[1])
+    flat = np.ravel_multi_index((pi[keep].astype(np.int64), li[keep], ni[keep]), shape)
+
+    size = int(np.prod(shape))
+    area = np.bincount(flat, weights=spots["area"].to_numpy(dtype=np.float64)[keep], minlength=size)
+    count = np.bincount(flat, minlength=size)
+    cube = np.stack([area, count]).reshape((len(CHANNELS),) + shape).astype(np.float32)
+    info = {
+        "cycles": [[str(start.date()), str(end.date())] for start, end in cycles],
+        "edges": {axis: edges[axis].tolist() for axis in AXES},
+    }
+    return cube, info
+
+
+def load_density_cube(csv_path=DEFAULT_CSV, phase_bins=20, lat_step=2.0, lon_step=10.0, min_area=0, rebuild=False):
+    """(memory-mapped cube, info) cached with the dataset; `info["edges"]` holds the bin edges per axis."""
+    params = {"phase_bins": phase_bins, "lat_step": lat_step, "lon_step": lon_step, "min_area": min_area}
+    def build(df):
+        cube, info = build_density_cube(df, **params)
+        return {"density_cube": cube}, info
+
+    arrays, info = derived_arrays("density_cube", build, csv_path, version=CUBE_VERSION, params=params,
+                                  rebuild=rebuild)
+    return arrays["density_cube"], info
+
+
+def _index_range(edges, bounds):
+    if bounds is None:
+        return slice(None)
+    lo, hi = bounds
+    return slice(np.searchsorted(edges, lo, side="right") - 1, np.searchsorted(edges, hi, side="left"))
+
+
+def selected_edges(info, axis, bounds=None):
+    """Bin edges of `axis` left after limiting it to `bounds`, as select() does."""
+    edges = np.asarray(info["edges"][axis])
+    index = _index_range(edges, bounds)
+    return edges[index.start:None if index.stop is None else index.stop + 1]
+
+
+def select(cube, info, channel="area", phase=None, latitude=None, longitude=None):
+    """Sub-cube (phase, latitude, longitude) of one channel, each axis optionally limited to a (lo, hi) range."""
+    ranges = {"phase": phase, "latitude": latitude, "longitude": longitude}
+    index = tuple(_index_range(np.asarray(info["edges"][axis]), ranges[axis]) for axis in AXES)
+    return cube[CHANNELS.index(channel)][index]
+
+
+def marginal(cube, info, keep=("latitude", "longitude"), channel="area", **ranges):
+    """Sum over every axis not in `keep`; the result keeps the cube's axis order."""
+    drop = tuple(i for i, axis in enumerate(AXES) if axis not in keep)
+    return select(cube, info, channel, **ranges).sum(axis=drop, dtype=np.float64)
+
+
+def densest_regions(cube, info, window=(3, 3), channel="area", top=5, **ranges):
+    """Latitude × longitude boxes of `window` bins with the most area (or spots), longitude wrapping at 360°.
+
+    Returns [(lat_lo, lat_hi, lon_lo, lon_hi, total)], best first; windows may overlap.
+    """
+    grid = marginal(cube, info, ("latitude", "longitude"), channel, **ranges)
+    lat_edges = selected_edges(info, "latitude", ranges.get("latitude"))
+    lon_edges = selected_edges(info, "longitude", ranges.get("longitude"))
+    wl, wn = window
+
+    # Box sums from a 2-D cumulative sum; the longitude axis is padded so windows wrap around
+    padded = np.concatenate([grid, grid[:, :wn - 1]], axis=1) if ranges.get("longitude") is None else grid
+    cs = np.pad(padded.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    boxes = cs[wl:, wn:] - cs[:-wl, wn:] - cs[wl:, :-wn] + cs[:-wl, :-wn]
+    boxes = boxes[:, :grid.shape[1]]
+
+    best = np.argsort(boxes, axis=None)[::-1][:top]
+    out = []
+    lon_step = lon_edges[1] - lon_edges[0]
+    for i, j in zip(*np.unravel_index(best, boxes.shape)):
+        lon_lo = lon_edges[j]
+        out.append((float(lat_edges[i]), float(lat_edges[i + wl]),
+                    float(lon_lo), float((lon_lo + wn * lon_step) % 360 or 360), float(boxes[i, j])))
+    return out
+
+
+def plot_density(cube, info, out_path, channel="area", dpi=300, **ranges):
+    """Latitude × longitude heatmap of the cube, summed over the selected phases."""
+    import matplotlib.pyplot as plt
+
+    grid = marginal(cube, info, ("latitude", "longitude"), channel, **ranges)
+    lat_edges = selected_edges(info, "latitude", ranges.get("latitude"))
+    lon_edges = selected_edges(info, "longitude", ranges.get("longitude"))
+    fig, ax = plt.subplots(figsize=(12, 6))
+    image = ax.imshow(grid, origin="lower", aspect="auto", cmap="hot",
+                      extent=(lon_edges[0], lon_edges[-1], lat_edges[0], lat_edges[-1]))
+    fig.colorbar(image, ax=ax, label="Total area (µHem)" if channel == "area" else "Spots")
+    ax.set_title("Sunspot density (all cycles)")
+    ax.set_xlabel("Carrington longitude (°)")
+    ax.set_ylabel("Latitude (°)")
+    save_figure(fig, out_path, dpi)
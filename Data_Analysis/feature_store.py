@@ -0,0 +1,163 @@
+"""Model features for the longitude network, built once per catalog version and memory-mapped.
+
+Every catalog row with a position and area becomes one row of a standardized
+float32 matrix X (latitude, time, area, duration) with targets y = (sin, cos)
+of its longitude. The scaler is fitted on the training rows only and stored, as
+are the train / validation / test row indices. Groups are assigned to splits as
+a whole, so no group has some days in training and others in the test set.
+Training runs and experiments then open the arrays from disk instead of
+rebuilding them, and all see the same features and splits.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+from cycles import cycle_label, cycle_phase, detect_cycles
+from gpr_loader import DEFAULT_CSV, cache_meta, derived_arrays
+from lifecycle import LIFECYCLE_VERSION, MAX_GAP_DAYS, load_lifecycle
+
+# 2: cycle labels in the info
+FEATURE_VERSION = 2
+FEATURES = ("latitude", "time_days", "area", "duration")
+SPLITS = ("train", "val", "test")
+DEFAULT_FRACTIONS = (0.7, 0.15, 0.15)
+
+
+def raw_features(df, lifecycle):
+    """(rows kept, unscaled float64 feature matrix, longitude in degrees) for catalog rows with complete values."""
+    keep = np.flatnonzero(df[["latitude", "longitude", "area"]].notna().all(axis=1).to_numpy())
+    sub = df.iloc[keep]
+    dates = sub["date"].to_numpy()
+    duration = lifecycle.set_index("group_id")["duration_days"]
+    X = np.column_stack([
+        sub["latitude"].to_numpy(dtype=np.float64),
+        (dates - df["date"].to_numpy()[0]) / np.timedelta64(1, "D"),
+        sub["area"].to_numpy(dtype=np.float64),
+        duration.reindex(sub["group_id"].to_numpy()).to_numpy(dtype=np.float64),
+    ])
+    return keep, X, sub["longitude"].to_numpy(dtype=np.float64)
+
+
+def split_groups(group_id, fractions=DEFAULT_FRACTIONS, seed=0):
+    """{split: sorted row indices}, drawing whole groups at random in the given proportions."""
+    groups, inverse = np.unique(group_id, return_inverse=True)
+    draw = np.random.default_rng(seed).random(len(groups))
+    which = np.searchsorted(np.cumsum(fractions) / np.sum(fractions), draw, side="right")
+    row_split = which[inverse]
+    return {name: np.flatnonzero(row_split == k) for k, name in enumerate(SPLITS)}
+
+
+def split_group_subset(group_id, groups, fractions=DEFAULT_FRACTIONS, seed=0):
+    """{split: sorted row indices} of just the rows of `groups`, dealt out by whole groups.
+
+    Every split gets at least one group, so a small subset (the top 20 groups, say)
+    can't leave validation or test empty the way filtering split_groups' draw over
+    all groups can. Raises ValueError if there are fewer groups than splits.
+    """
+    rows = np.flatnonzero(np.isin(group_id, np.asarray(groups)))
+    present = np.unique(group_id[rows])
+    if len(present) < len(SPLITS):
+        raise ValueError(f"{len(present)} groups with features; need at least {len(SPLITS)} to split them")
+    share = np.asarray(fractions, dtype=np.float64) / np.sum(fractions)
+    counts = np.maximum(1, np.round(share * len(present)).astype(np.int64))
+    counts[0] = len(present) - counts[1:].sum()
+    if counts[0] < 1:
+        raise ValueError(f"{len(present)} groups are too few for split fractions {list(fractions)}")
+    shuffled = np.random.default_rng(seed).permutation(present)
+    bounds = np.r_[0, np.cumsum(counts)]
+    return {name: rows[np.isin(group_id[rows], shuffled[bounds[k]:bounds[k + 1]])]
+            for k, name in enumerate(SPLITS)}
+
+
+def build_features(df, lifecycle, cycles, fractions=DEFAULT_FRACTIONS, seed=0):
+    """Arrays and info of the feature store; see the module docstring."""
+    rows, X, longitude = raw_features(df, lifecycle)
+    group_id = df["group_id"].to_numpy()[rows]
+    splits = split_groups(group_id, fractions, seed)
+    mean = X[splits["train"]].mean(axis=0)
+    scale = X[splits["train"]].std(axis=0)
+    scale[scale == 0] = 1.0
+    lon = np.radians(longitude)
+    _, cycle = cycle_phase(df["date"].to_numpy()[rows], cycles)
+
+    arrays = {
+        "X": ((X - mean) / scale).astype(np.float32),
+        "y": np.column_stack([np.sin(lon), np.cos(lon)]).astype(np.float32),
+        "longitude": longitude.astype(np.float32),
+        "group_id": group_id.astype(np.int32),
+        "row": rows.astype(np.int64),
+        "cycle": cycle.astype(np.int16),
+    }
+    arrays.update(splits)
+    info = {
+        "features": list(FEATURES),
+        "mean": mean.tolist(),
+        "scale": scale.tolist(),
+        "time_origin": str(df["date"].iloc[0]),
+        "cycles": [cycle_label(start, end) for start, end in cycles],
+    }
+    return arrays, info
+
+
+class FeatureStore:
+    """Read-only view of the stored arrays: X, y, longitude, group_id, row, cycle and the split indices."""
+
+    def __init__(self, arrays, info):
+        self.arrays = arrays
+        self.info = info
+        self.mean = np.asarray(info["mean"])
+        self.scale = np.asarray(info["scale"])
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __len__(self):
+        return len(self.arrays["X"])
+
+    @property
+    def features(self):
+        return self.info["features"]
+
+    def split(self, name, groups=None):
+        """Row indices of split `name`, optionally only those of the given group ids."""
+        idx = self.arrays[name]
+        if groups is not None:
+            idx = idx[np.isin(self.arrays["group_id"][idx], np.asarray(groups))]
+        return idx
+
+    def group_splits(self, groups, fractions=DEFAULT_FRACTIONS, seed=0):
+        """split_group_subset over this store's rows: a fresh split of just `groups`."""
+        return split_group_subset(np.asarray(self.arrays["group_id"]), groups, fractions, seed)
+
+    def transform(self, raw):
+        """Standardize raw feature rows (columns in FEATURES order) with the stored scaler."""
+        return ((np.asarray(raw, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+
+    def inverse_transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale + self.mean
+
+
+def _store_params(fractions, seed, max_gap_days):
+    # The duration feature comes from the lifecycle table, so its version and gap are part of the key
+    return {"fractions": list(fractions), "seed": seed,
+            "lifecycle_version": LIFECYCLE_VERSION, "max_gap_days": max_gap_days}
+
+
+def load_features(csv_path=DEFAULT_CSV, fractions=DEFAULT_FRACTIONS, seed=0, rebuild=False,
+                  max_gap_days=MAX_GAP_DAYS):
+    """The feature store for this catalog, built on first use and cached next to it."""
+    def build(df):
+        lifecycle = load_lifecycle(csv_path, max_gap_days=max_gap_days)
+        return build_features(df, lifecycle, detect_cycles(df), fractions, seed)
+
+    arrays, info = derived_arrays("features", build, csv_path, version=FEATURE_VERSION,
+                                  params=_store_params(fractions, seed, max_gap_days), rebuild=rebuild)
+    return FeatureStore(arrays, info)
+
+
+def store_version(csv_path=DEFAULT_CSV, fractions=DEFAULT_FRACTIONS, seed=0, max_gap_days=MAX_GAP_DAYS):
+    """Short id of the store's contents (catalog digest, FEATURE_VERSION, build parameters) for keying results."""
+    params = json.dumps(_store_params(fractions, seed, max_gap_days), sort_keys=True)
+    key = f"{cache_meta(csv_path)['sha256']}:{FEATURE_VERSION}:{params}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
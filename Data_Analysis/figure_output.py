@@ -0,0 +1,149 @@
+"""Non-interactive figure output shared by the analysis scripts.
+
+Batch runs never open windows: use_headless() forces the Agg backend and every
+plot goes through save_figure() instead of plt.show().
+
+save_figure() can write several variants of a figure from one raster render:
+the full-size PNG for the archive plus a web-size WebP and a thumbnail for the
+site, and optionally an SVG. Every write is recorded so a run can finish with
+write_index(), a JSON list of the files and their pixel and byte sizes.
+"""
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+# variant -> (file suffix, format, longest side in pixels or None for full size)
+VARIANTS = {
+    "png": (".png", "png", None),
+    "webp": (".webp", "webp", 1600),
+    "thumb": (".thumb.webp", "webp", 320),
+    "svg": (".svg", "svg", None),
+}
+DEFAULT_VARIANTS = ("png",)
+
+# Process-wide output settings and the figures written so far
+_output = {"variants": DEFAULT_VARIANTS, "written": {}}
+
+
+def use_headless():
+    """Make matplotlib use Agg with interactive mode off, without importing it.
+
+    Cheap enough to call at startup: if matplotlib isn't loaded yet only the
+    environment is set, so runs that never plot never import it.
+    """
+    os.environ["MPLBACKEND"] = "Agg"
+    if "matplotlib" in sys.modules:
+        sys.modules["matplotlib"].use("Agg", force=True)
+    plt = sys.modules.get("matplotlib.pyplot")
+    if plt is not None:
+        plt.ioff()
+
+
+def configure_output(variants=DEFAULT_VARIANTS):
+    """Choose the variants every later save_figure() call writes."""
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"unknown figure variants {sorted(unknown)}; choose from {list(VARIANTS)}")
+    _output["variants"] = tuple(variants)
+
+
+def output_variants():
+    return _output["variants"]
+
+
+def variant_path(out_path, variant):
+    return os.path.splitext(out_path)[0] + VARIANTS[variant][0]
+
+
+def _describe(path, fmt, width=None, height=None):
+    entry = {"path": path, "format": fmt, "bytes": os.path.getsize(path)}
+    if width is not None:
+        entry["width"], entry["height"] = width, height
+    return entry
+
+
+def _render_rgba(fig, dpi, **savefig_kw):
+    """Rasterize the figure once and return it as a PIL image."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+
+    canvas = fig.canvas if isinstance(fig.canvas, FigureCanvasAgg) else FigureCanvasAgg(fig)
+    buf = io.BytesIO()
+    canvas.print_figure(buf, format="rgba", dpi=dpi, **savefig_kw)
+    # Size of the buffer actually written, i.e. of the last renderer: bbox_inches="tight"
+    # crops it, and the figure's own size is restored after saving
+    size = (int(canvas.renderer.width), int(canvas.renderer.height))
+    pixels = np.frombuffer(buf.getbuffer(), dtype=np.uint8)
+    if pixels.size != 4 * size[0] * size[1]:
+        raise ValueError(f"rendered {pixels.size} bytes, expected a {size[0]}x{size[1]} RGBA buffer")
+    return Image.frombuffer("RGBA", size, pixels, "raw", "RGBA", 0, 1)
+
+
+def save_figure(fig, out_path, dpi=300, close=True, variants=None, **savefig_kw):
+    """Write `fig` to `out_path` (creating its folder) in every configured variant.
+
+    Reusable templates pass close=False. Returns {variant: {path, format, bytes[, width, height]}}.
+    """
+    folder = os.path.dirname(out_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    variants = output_variants() if variants is None else tuple(variants)
+
+    outputs = {}
+    if variants == ("png",):
+        fig.savefig(out_path, dpi=dpi, **savefig_kw)
+        outputs["png"] = _describe(out_path, "png")
+    else:
+        image = None
+        for variant in variants:
+            path = variant_path(out_path, variant)
+            _, fmt, max_side = VARIANTS[variant]
+            if fmt == "svg":
+                fig.savefig(path, format="svg", **savefig_kw)
+                outputs[variant] = _describe(path, fmt)
+                continue
+            if image is None:
+                image = _render_rgba(fig, dpi, **savefig_kw)
+            out = image
+            if max_side is not None and max(image.size) > max_side:
+                out = image.copy()
+                out.thumbnail((max_side, max_side))
+            if fmt == "png":
+                out.save(path, format="png", dpi=(dpi, dpi))
+            else:
+                out.save(path, format=fmt, quality=80, method=4)
+            outputs[variant] = _describe(path, fmt, *out.size)
+
+    if close:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    _output["written"][out_path] = outputs
+    return outputs
+
+
+def written_figures():
+    return dict(_output["written"])
+
+
+def write_index(path, figures=None):
+    """Merge `figures` (default: everything saved in this process) into the JSON index at `path`."""
+    figures = written_figures() if figures is None else figures
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    root = os.path.dirname(os.path.abspath(path))
+    for figure, outputs in figures.items():
+        # Paths relative to the index so the folder can be published as is
+        index[os.path.relpath(figure, root)] = {
+            variant: dict(entry, path=os.path.relpath(entry["path"], root)) for variant, entry in outputs.items()
+        }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(dict(sorted(index.items())), f, indent=2)
+    os.replace(tmp_path, path)
+    return index
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CSV = "gpr_1874_1976_corrected.csv"
+CACHE_FOLDER = ".gpr_cache"
+# 2: rows are stored sorted by date
+CACHE_VERSION = 2
+# Format of the derived caches' meta.json; older layouts are rebuilt
+DERIVED_LAYOUT = 2
+
+# Compact dtypes for the known GPR columns, anything else keeps its parsed dtype
+COLUMN_DTYPES = {
+    "year": "int16", "month": "int16", "day": "int16",
+    "hour": "int8", "minute": "int8", "second": "int8",
+    "group_id": "int32",
+    "latitude": "float32", "longitude": "float32", "area": "float32",
+}
+DATE_PARTS = ["year", "month", "day", "hour", "minute", "second"]
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_dir_for(csv_path):
+    folder, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(folder, CACHE_FOLDER, os.path.splitext(name)[0])
+
+
+def _compact(series, dtype):
+    # Integer columns with gaps can't be narrowed, leave those as float
+    if np.dtype(dtype).kind == "i" and series.isna().any():
+        return series.to_numpy(dtype="float32")
+    return series.to_numpy(dtype=dtype)
+
+
+def _column_array(df, name):
+    if name in COLUMN_DTYPES:
+        return _compact(df[name], COLUMN_DTYPES[name])
+    values = df[name].to_numpy()
+    if values.dtype.kind == "O":
+        values = values.astype(str)
+    return values
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, "meta.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+
+
+def _load_columns(folder, names):
+    # Copy-on-write maps: pages are only read when touched, and nothing writes back to disk
+    data = {name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="c") for name in names}
+    return pd.DataFrame(data, copy=False)
+
+
+def build_cache(csv_path, cache_dir=None):
+    """Parse the CSV once and store every column as a .npy array."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(csv_path)
+    digest = file_digest(csv_path)
+
+    df = pd.read_csv(csv_path)
+    df["date"] = pd.to_datetime(dict(
+        year=df.year, month=df.month, day=df.day,
+        hour=df.hour, minute=df.minute, second=df.second
+    ))
+    # Sorted once here so time windows can be located by binary search (see time_slice)
+    df = df.sort_values("date", kind="stable", ignore_index=True)
+
+    columns = []
+    for name in df.columns:
+        np.save(os.path.join(cache_dir, f"{name}.npy"), _column_array(df, name))
+        columns.append(name)
+
+    # meta.json is written last so a half-built cache is never picked up
+    meta = {
+        "version": CACHE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "sha256": digest,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": len(df),
+        "columns": columns,
+    }
+    _write_meta(cache_dir, meta)
+    return meta
+
+
+def cache_meta(csv_path=DEFAULT_CSV, cache_dir=None, rebuild=False):
+    """Return the metadata of an up-to-date cache, rebuilding it if the CSV changed."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    meta = None if rebuild else _read_meta(cache_dir)
+    if meta is None or meta.get("version") != CACHE_VERSION:
+        return build_cache(csv_path, cache_dir)
+
+    stat = os.stat(csv_path)
+    if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+        return meta
+    # Touched but maybe not modified (copied, checked out again): compare content
+    if meta["size"] == stat.st_size and file_digest(csv_path) == meta["sha256"]:
+        meta["mtime_ns"] = stat.st_mtime_ns
+        _write_meta(cache_dir, meta)
+        return meta
+    return build_cache(csv_path, cache_dir)
+
+
+def load_gpr(csv_path=DEFAULT_CSV, columns=None, cache_dir=None, rebuild=False):
+    """Load the GPR catalog from its columnar cache, with the `date` column ready."""
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    meta = cache_meta(csv_path, cache_dir, rebuild)
+    names = meta["columns"] if columns is None else list(columns)
+    return _load_columns(cache_dir, names)
+
+
+def _current_meta(folder, source, version, params):
+    """meta.json of a derived cache if it was built from this catalog with this version and params."""
+    meta = _read_meta(folder)
+    if (meta is not None and meta.get("sha256") == source["sha256"] and meta.get("version") == version
+            and meta.get("catalog_version") == CACHE_VERSION and meta.get("layout") == DERIVED_LAYOUT
+            and meta.get("params") == params):
+        return meta
+    return None
+
+
+def derived_arrays(name, build, csv_path=DEFAULT_CSV, version=1, params=None, cache_dir=None, rebuild=False,
+                   mmap_mode="r"):
+    """Cache arrays computed from the catalog next to it; rebuilt when the CSV, `version` or `params` change.
+
+    `build(df)` receives the loaded catalog and returns ({array name: array}, info), where
+    `info` is JSON metadata handed back with the arrays. Returns the same pair with every
+    array memory-mapped (read-only by default).
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    source = cache_meta(csv_path, cache_dir)
+    folder = os.path.join(cache_dir, name)
+    meta = None if rebuild else _current_meta(folder, source, version, params)
+    if meta is None:
+        arrays, info = build(load_gpr(csv_path, cache_dir=cache_dir))
+        os.makedirs(folder, exist_ok=True)
+        for key, array in arrays.items():
+            np.save(os.path.join(folder, f"{key}.npy"), array)
+        meta = {
+            "version": version,
+            "catalog_version": CACHE_VERSION,
+            "layout": DERIVED_LAYOUT,
+            "sha256": source["sha256"],
+            "params": params,
+            "shapes": {key: list(array.shape) for key, array in arrays.items()},
+            "info": info,
+        }
+        _write_meta(folder, meta)
+    arrays = {key: np.load(os.path.join(folder, f"{key}.npy"), mmap_mode=mmap_mode) for key in meta["shapes"]}
+    return arrays, meta["info"]
+
+
+def derived_table(name, build, csv_path=DEFAULT_CSV, version=1, params=None, cache_dir=None, rebuild=False):
+    """derived_arrays for a DataFrame: `build(df)` returns the table, which comes back column-mapped."""
+    def build_columns(df):
+        table = build(df)
+        return {column: table[column].to_numpy() for column in table.columns}, None
+
+    columns, _ = derived_arrays(name, build_columns, csv_path, version, params, cache_dir, rebuild, mmap_mode="c")
+    return pd.DataFrame(columns, copy=False)
+
+
+def window_bounds(df, starts, ends):
+    """Row ranges [i, j) of a date-sorted frame covering start <= date < end, for many windows at once."""
+    dates = df["date"].to_numpy()
+    starts = np.asarray(starts, dtype=dates.dtype)
+    ends = np.asarray(ends, dtype=dates.dtype)
+    return np.searchsorted(dates, starts, side="left"), np.searchsorted(dates, ends, side="left")
+
+
+def time_slice(df, start=None, end=None):
+    """Rows with start <= date < end, found by binary search and returned as a positional slice.
+
+    `df` must be sorted by date, as load_gpr returns it (row filters keep that order).
+    """
+    dates = df["date"].to_numpy()
+    i = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "s"), side="left")
+    j = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "s"), side="left")
+    return df.iloc[i:j]
@@ -0,0 +1,172 @@
+"""Hyperparameter search for the longitude network: successive halving over a process pool.
+
+Every configuration is first trained for a small epoch budget; only the best
+1/eta go on to the next rung with eta times the budget, up to the full epoch
+count. Within a trial, early stopping on the validation loss ends training once
+it stops improving. Trials train on the feature store's training split and are
+scored by mean angular error on its validation split.
+
+Each finished trial is written to its own JSON file, keyed on the feature-store
+version, the selected rows, the hyperparameters and the epoch budget, so an
+interrupted sweep picks up where it stopped and repeating a sweep costs nothing.
+"""
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from circular import angular_error, decode_longitude
+from feature_store import load_features, store_version
+from gpr_loader import DEFAULT_CSV, cache_dir_for
+from walk_forward import pin_threads
+
+# The values long_prediction.py used to hardcode are one corner of this grid
+DEFAULT_SPACE = {
+    "layers": [(128, 128, 64), (64, 64), (256, 128, 64), (128, 64, 32, 16)],
+    "dropout": [0.0, 0.2, 0.4],
+    "learning_rate": [3e-4, 1e-3, 3e-3],
+    "batch_size": [32, 128],
+}
+
+# Per-process state: the store and the rows every trial trains and validates on
+_worker = {}
+
+
+def sample_configs(space=DEFAULT_SPACE, n_configs=None, seed=0):
+    """Every combination in `space`, or `n_configs` of them drawn without replacement."""
+    names = list(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if n_configs is None or n_configs >= len(grid):
+        return grid
+    pick = np.random.default_rng(seed).choice(len(grid), size=n_configs, replace=False)
+    return [grid[i] for i in sorted(pick)]
+
+
+def trial_key(version, rows_digest, config, epochs, patience, seed):
+    text = json.dumps({"store": version, "rows": rows_digest, "config": config, "epochs": epochs,
+                       "patience": patience, "seed": seed}, sort_keys=True, default=list)
+    return hashlib.sha256(text.encode()).hexdigest()[:20]
+
+
+def _rows_digest(train, val):
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(train, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(val, dtype=np.int64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def _read_trial(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_trial(path, result):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(result, f, indent=2, default=list)
+    os.replace(tmp_path, path)
+
+
+def _init_trial_worker(csv_path, train, val, trainer, threads):
+    if threads:
+        pin_threads(threads)
+    store = load_features(csv_path)
+    _worker.update(
+        X_train=np.asarray(store["X"][train]), y_train=np.asarray(store["y"][train]),
+        X_val=np.asarray(store["X"][val]), y_val=np.asarray(store["y"][val]),
+        lon_val=np.asarray(store["longitude"][val]), trainer=trainer,
+    )
+
+
+def run_trial(job):
+    """Train one configuration for one epoch budget and score it on the validation rows."""
+    config, epochs, patience, seed = job
+    w = _worker
+    start = time.perf_counter()
+    pred, epochs_run = w["trainer"](w["X_train"], w["y_train"], w["X_val"], w["y_val"],
+                                    epochs=epochs, patience=patience, seed=seed, **config)
+    errors = angular_error(w["lon_val"], decode_longitude(pred))
+    return {"config": config, "epochs": epochs, "epochs_run": int(epochs_run),
+            "val_error": float(errors.mean()), "val_median_error": float(np.median(errors)),
+            "seconds": round(time.perf_counter() - start, 2)}
+
+
+def successive_halving(configs, run_rung, min_epochs=10, max_epochs=100, eta=3):
+    """Run every config at `min_epochs`, keep the best 1/eta, multiply the budget by eta, repeat.
+
+    `run_rung(configs, epochs)` returns one result dict (with val_error) per config, in order.
+    """
+    results, alive, epochs, rung = [], list(configs), min(min_epochs, max_epochs), 0
+    while alive:
+        scored = run_rung(alive, epochs)
+        for result in scored:
+            result["rung"] = rung
+        results.extend(scored)
+        if epochs >= max_epochs or len(alive) == 1:
+            break
+        order = np.argsort([r["val_error"] for r in scored], kind="stable")
+        alive = [alive[i] for i in order[:math.ceil(len(alive) / eta)]]
+        epochs, rung = min(epochs * eta, max_epochs), rung + 1
+    return results
+
+
+def search(csv_path=DEFAULT_CSV, trainer=None, configs=None, groups=None, min_epochs=10, max_epochs=100, eta=3,
+           patience=10, seed=0, workers=1, threads=1, trial_dir=None):
+    """Successive-halving search; returns one row per trial run (cached or new), best first.
+
+    `trainer` has long_prediction.fit_validate's signature (the default); `groups`
+    restricts training and validation to those group ids.
+    """
+    if trainer is None:
+        from long_prediction import fit_validate as trainer
+    configs = sample_configs() if configs is None else configs
+    store = load_features(csv_path)
+    train, val = store.split("train", groups), store.split("val", groups)
+    if not len(train) or not len(val):
+        raise ValueError("no training or validation rows for these groups")
+
+    version, rows_digest = store_version(csv_path), _rows_digest(train, val)
+    trial_dir = trial_dir or os.path.join(cache_dir_for(csv_path), "trials", version)
+    os.makedirs(trial_dir, exist_ok=True)
+
+    if workers <= 1:
+        _init_trial_worker(csv_path, train, val, trainer, None)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_trial_worker,
+                                       initargs=(csv_path, train, val, trainer, threads))
+
+    def run_rung(rung_configs, epochs):
+        paths = [os.path.join(trial_dir, trial_key(version, rows_digest, c, epochs, patience, seed) + ".json")
+                 for c in rung_configs]
+        results = [_read_trial(path) for path in paths]
+        for config, result in zip(rung_configs, results):
+            if result is not None:
+                # JSON turns tuples into lists; report the config as given
+                result.update(config=config, cached=True)
+        todo = [i for i, result in enumerate(results) if result is None]
+        jobs = [(rung_configs[i], epochs, patience, seed) for i in todo]
+        done = executor.map(run_trial, jobs) if executor else map(run_trial, jobs)
+        # Written as each trial finishes so an interrupted sweep keeps its progress
+        for i, result in zip(todo, done):
+            _write_trial(paths[i], result)
+            results[i] = dict(result, cached=False)
+            print(f"  {epochs:>4} epochs  {result['val_error']:6.2f}°  {result['config']}")
+        return results
+
+    try:
+        results = successive_halving(configs, run_rung, min_epochs, max_epochs, eta)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    table = pd.DataFrame([dict(r["config"], **{k: v for k, v in r.items() if k != "config"}) for r in results])
+    return table.sort_values(["rung", "val_error"], ascending=[False, True], ignore_index=True)
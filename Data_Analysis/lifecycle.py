@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from gpr_loader import DEFAULT_CSV, derived_table
+
+# 2: duration_days is the length of the main disk passage; span_days, n_passages and growth/decay rates added
+# 3: peak-area ties go to the earliest observation, whatever the row order
+LIFECYCLE_VERSION = 3
+# A group unseen for longer than this has rotated off the disk (or decayed and re-formed): new passage
+MAX_GAP_DAYS = 7
+
+
+PEAK_COLUMNS = ["peak_area", "peak_date", "peak_lat", "peak_lon"]
+
+
+def _peaks(table):
+    # Peak row = the group's largest area, earliest on ties (then lowest lat/lon), so
+    # the result doesn't depend on row order; NaN areas sort last
+    return (table.sort_values(PEAK_COLUMNS, ascending=[False, True, True, True], kind="stable",
+                              na_position="last")
+            .loc[:, ["group_id"] + PEAK_COLUMNS]
+            .drop_duplicates("group_id")
+            .set_index("group_id"))
+
+
+def partial_lifecycle(df):
+    """Mergeable per-group sums/extremes for a block of observations (see combine_lifecycle)."""
+    lon_rad = np.deg2rad(df["longitude"].to_numpy(dtype=np.float64))
+    obs = pd.DataFrame({
+        "group_id": df["group_id"].to_numpy(),
+        "date": df["date"].to_numpy(),
+        "latitude": df["latitude"].to_numpy(dtype=np.float64),
+        "lon_sin": np.sin(lon_rad),
+        "lon_cos": np.cos(lon_rad),
+    })
+    stats = obs.groupby("group_id", sort=True).agg(
+        first_seen=("date", "min"),
+        last_seen=("date", "max"),
+        n_obs=("date", "size"),
+        lat_sum=("latitude", "sum"),
+        lat_n=("latitude", "count"),
+        lon_sin=("lon_sin", "sum"),
+        lon_cos=("lon_cos", "sum"),
+    )
+    peaks = _peaks(pd.DataFrame({
+        "group_id": obs["group_id"],
+        "peak_area": df["area"].to_numpy(),
+        "peak_date": obs["date"],
+        "peak_lat": df["latitude"].to_numpy(),
+        "peak_lon": df["longitude"].to_numpy(),
+    }))
+    return stats.join(peaks)
+
+
+def combine_lifecycle(*partials):
+    """Merge partial tables of any blocks, in any order."""
+    both = pd.concat(partials)
+    stats = both.groupby(level=0, sort=True).agg(
+        first_seen=("first_seen", "min"),
+        last_seen=("last_seen", "max"),
+        n_obs=("n_obs", "sum"),
+        lat_sum=("lat_sum", "sum"),
+        lat_n=("lat_n", "sum"),
+        lon_sin=("lon_sin", "sum"),
+        lon_cos=("lon_cos", "sum"),
+    )
+    return stats.join(_peaks(both.rename_axis("group_id").reset_index()))
+
+
+def daily_group_area(df):
+    """Total area of every group on every day it was observed, sorted by (group_id, day)."""
+    daily = pd.DataFrame({
+        "group_id": df["group_id"].to_numpy(),
+        "day": df["date"].to_numpy().astype("datetime64[D]"),
+        "area": df["area"].to_numpy(dtype=np.float64),
+    })
+    return daily.groupby(["group_id", "day"], sort=True)["area"].sum().reset_index()
+
+
+def combine_daily(*dailies):
+    """Merge daily tables of several blocks; a group-day split across blocks is summed."""
+    both = pd.concat(dailies, ignore_index=True)
+    return both.groupby(["group_id", "day"], sort=True)["area"].sum().reset_index()
+
+
+def disk_passages(daily, max_gap_days=MAX_GAP_DAYS):
+    """Split every group's daily series into passages wherever it goes unseen for more than `max_gap_days`.
+
+    One row per passage: group_id, passage (0, 1, ... within the group), start, end,
+    duration_days (end - start + 1), n_days observed, peak_area, peak_day, and the
+    mean daily growth rate (first day -> peak) and decay rate (peak -> last day) in µHem/day.
+    Rates are NaN when the peak falls on the first or last day.
+    """
+    gid = daily["group_id"].to_numpy()
+    day = daily["day"].to_numpy().astype("datetime64[D]")
+    area = daily["area"].to_numpy(dtype=np.float64)
+    if len(gid) == 0:
+        raise ValueError("no observations")
+
+    new_group = np.r_[True, gid[1:] != gid[:-1]]
+    gap = np.r_[0, np.diff(day).astype(np.int64)]
+    new_passage = new_group | (gap > max_gap_days)
+    pid = np.cumsum(new_passage) - 1
+    starts = np.flatnonzero(new_passage)
+    ends = np.r_[starts[1:], len(gid)] - 1
+
+    # First day carrying each passage's largest area
+    peak_area = np.maximum.reduceat(area, starts)
+    at_peak = np.flatnonzero(area == peak_area[pid])
+    _, first = np.unique(pid[at_peak], return_index=True)
+    peak = at_peak[first]
+
+    # Passage number within its group: position minus the group's first passage
+    group_first = np.maximum.accumulate(np.where(new_group[starts], np.arange(len(starts)), 0))
+    rise_days = (day[peak] - day[starts]).astype(np.float64)
+    fall_days = (day[ends] - day[peak]).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth = np.where(rise_days > 0, (peak_area - area[starts]) / rise_days, np.nan)
+        decay = np.where(fall_days > 0, (peak_area - area[ends]) / fall_days, np.nan)
+    return pd.DataFrame({
+        "group_id": gid[starts],
+        "passage": (np.arange(len(starts)) - group_first).astype(np.int16),
+        "start": day[starts].astype("datetime64[s]"),
+        "end": day[ends].astype("datetime64[s]"),
+        "duration_days": ((day[ends] - day[starts]).astype(np.int64) + 1).astype(np.int32),
+        "n_days": (ends - starts + 1).astype(np.int32),
+        "peak_area": peak_area.astype(np.float32),
+        "peak_day": day[peak].astype("datetime64[s]"),
+        "growth_rate": growth.astype(np.float32),
+        "decay_rate": decay.astype(np.float32),
+    })
+
+
+def main_passages(passages):
+    """Per group, the passage with the largest daily area (earliest on ties), indexed by group_id."""
+    order = np.lexsort((passages["start"].to_numpy(), -passages["peak_area"].to_numpy(dtype=np.float64),
+                        passages["group_id"].to_numpy()))
+    main = passages.iloc[order].drop_duplicates("group_id").set_index("group_id")
+    main["n_passages"] = passages.groupby("group_id", sort=True).size()
+    return main
+
+
+def finalize_lifecycle(partial, passages):
+    """Partial table + the groups' disk passages -> the lifecycle table (one row per group).
+
+    duration_days is the length of the group's main passage, so a group that rotates
+    off the disk and comes back isn't counted as alive in between; span_days covers
+    first to last sighting.
+    """
+    main = main_passages(passages).reindex(partial.index)
+    # Calendar days, like the passages, so span_days >= duration_days always
+    span = partial["last_seen"].dt.normalize() - partial["first_seen"].dt.normalize()
+    return pd.DataFrame({
+        "group_id": partial.index.to_numpy(),
+        "first_seen": partial["first_seen"].to_numpy(),
+        "last_seen": partial["last_seen"].to_numpy(),
+        "duration_days": main["duration_days"].to_numpy(dtype=np.int32),
+        "span_days": (span.dt.days + 1).to_numpy(dtype=np.int32),
+        "n_passages": main["n_passages"].to_numpy(dtype=np.int16),
+        "n_obs": partial["n_obs"].to_numpy(dtype=np.int32),
+        "peak_area": partial["peak_area"].to_numpy(),
+        "peak_date": partial["peak_date"].to_numpy(),
+        "peak_lat": partial["peak_lat"].to_numpy(),
+        "peak_lon": partial["peak_lon"].to_numpy(),
+        "mean_lat": (partial["lat_sum"] / partial["lat_n"]).to_numpy(dtype=np.float32),
+        # Circular mean so groups straddling 0°/360° don't average to 180°
+        "mean_lon": (np.rad2deg(np.arctan2(partial["lon_sin"], partial["lon_cos"])) % 360).to_numpy(dtype=np.float32),
+        "growth_rate": main["growth_rate"].to_numpy(dtype=np.float32),
+        "decay_rate": main["decay_rate"].to_numpy(dtype=np.float32),
+    })
+
+
+def group_lifecycle(df, max_gap_days=MAX_GAP_DAYS):
+    """One row per sunspot group: first/last seen, main-passage duration, growth/decay, peak and mean position."""
+    return finalize_lifecycle(partial_lifecycle(df), disk_passages(daily_group_area(df), max_gap_days))
+
+
+def load_lifecycle(csv_path=DEFAULT_CSV, rebuild=False, max_gap_days=MAX_GAP_DAYS):
+    """Group lifecycle table, computed once per catalog version and cached with the dataset."""
+    return derived_table("lifecycle", lambda df: group_lifecycle(df, max_gap_days), csv_path,
+                         version=LIFECYCLE_VERSION, rebuild=rebuild, params={"max_gap_days": max_gap_days})
+
+
+def load_passages(csv_path=DEFAULT_CSV, rebuild=False, max_gap_days=MAX_GAP_DAYS):
+    """Disk-passage table (see disk_passages), cached like the lifecycle table."""
+    return derived_table("passages", lambda df: disk_passages(daily_group_area(df), max_gap_days), csv_path,
+                         version=LIFECYCLE_VERSION, rebuild=rebuild, params={"max_gap_days": max_gap_days})
+
+
+def groups_peaking_in(lifecycle, start, end):
+    """Groups whose peak falls inside [start, end)."""
+    peak = lifecycle["peak_date"]
+    return lifecycle[(peak >= start) & (peak < end)]
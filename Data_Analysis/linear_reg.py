@@ -1,39 +1,60 @@
+import argparse
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 import numpy as np
-df = pd.read_csv("gpr_1874_1976_corrected.csv")
-df["date"] = pd.to_datetime(dict(
-    year=df.year, month=df.month, day=df.day,
-    hour=df.hour, minute=df.minute, second=df.second
-))
-sunspots = []
-for group_id, g in df.groupby("group_id"):
-    if g.empty:
-        continue
-    duration = (g["date"].max() - g["date"].min()).days + 1
-    max_area = g["area"].max()
-    if max_area > 0 and duration > 0:
-        sunspots.append((max_area, duration))
-sun_df = pd.DataFrame(sunspots, columns=["area", "duration"])
-sun_df = sun_df[(sun_df["area"] > 500) & (sun_df["duration"] > 7) & (sun_df["duration"] <= 100)]
-X = sun_df[["area"]].values
-y = sun_df["duration"].values
-model = LinearRegression()
-model.fit(X, y)
-x_fit = np.linspace(X.min(), X.max(), 200).reshape(-1, 1)
-y_fit = model.predict(x_fit)
-slope = model.coef_[0]
-intercept = model.intercept_
-r2 = model.score(X, y)
-equation_text = f"y = {slope:.5f}x + {intercept:.2f}, R² = {r2:.3f}"
-
-plt.figure(figsize=(10,6))
-plt.scatter(sun_df["area"], sun_df["duration"], s=10, alpha=0.5, label="Sunspots")
-plt.plot(x_fit, y_fit, color="red", linewidth=2, label=equation_text)
-plt.xlabel("Max Area (micro-hemispheres)")
-plt.ylabel("Duration (days)")
-plt.title("Sunspot Area vs Duration (Filtered: Area>500)")
-plt.ylim(0, 100)
-plt.legend()
-plt.savefig("analysis/linear_regression_area_duration.png", dpi=300)
+from figure_output import save_figure
+from lifecycle import load_lifecycle
+from regression import METHODS, confidence_band, fit_by_method, format_equation
+
+
+def plot_area_duration(lifecycle, out_path="analysis/linear_regression_area_duration.png",
+                       min_area=500, min_duration=7, max_duration=100, dpi=300, method="ols"):
+    sun_df = pd.DataFrame({"area": lifecycle["peak_area"], "duration": lifecycle["duration_days"]})
+    sun_df = sun_df[(sun_df["area"] > min_area) & (sun_df["duration"] > min_duration) & (sun_df["duration"] <= max_duration)]
+    X = sun_df["area"].to_numpy()
+    y = sun_df["duration"].to_numpy()
+    fit = fit_by_method(X, y, method)
+    slope = float(fit["slope"])
+    intercept = float(fit["intercept"])
+    r2 = float(fit.get("r2", np.nan))
+    x_fit = np.linspace(X.min(), X.max(), 200)
+    y_fit = intercept + slope * x_fit
+    equation_text = format_equation(slope, intercept, r2)
+
+    fig = plt.figure(figsize=(10,6))
+    plt.scatter(sun_df["area"], sun_df["duration"], s=10, alpha=0.5, label="Sunspots")
+    plt.plot(x_fit, y_fit, color="red", linewidth=2, label=equation_text)
+    if method == "ols":
+        _, lo, hi = confidence_band(fit, x_fit)
+        plt.fill_between(x_fit, lo, hi, color="red", alpha=0.2, label="95% confidence band")
+    plt.xlabel("Max Area (micro-hemispheres)")
+    plt.ylabel("Duration (days)")
+    plt.title(f"Sunspot Area vs Duration (Filtered: Area>{min_area})")
+    plt.ylim(0, max_duration)
+    plt.legend()
+    save_figure(fig, out_path, dpi)
+    return slope, intercept, r2
+
+
+def check_methods(lifecycle, out_dir="analysis", dpi=72):
+    """Plot the area-duration fit once per regression method; raises if any method fails or gives no line."""
+    for method in METHODS:
+        slope, intercept, _ = plot_area_duration(
+            lifecycle, os.path.join(out_dir, f"linear_regression_area_duration_{method}.png"), dpi=dpi, method=method)
+        if not (np.isfinite(slope) and np.isfinite(intercept)):
+            raise ValueError(f"{method} fit gave no line: slope {slope}, intercept {intercept}")
+        print(f"{method}: {format_equation(slope, intercept)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sunspot peak area vs duration regression")
+    parser.add_argument("--method", choices=list(METHODS), default="ols")
+    parser.add_argument("--check", action="store_true", help="plot every method once and fail on a bad fit")
+    args = parser.parse_args()
+    lifecycle = load_lifecycle("gpr_1874_1976_corrected.csv")
+    if args.check:
+        check_methods(lifecycle)
+    else:
+        plot_area_duration(lifecycle, method=args.method)
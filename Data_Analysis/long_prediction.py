@@ -1,62 +1,100 @@
 #run in colab
 #mount drive
 
-import pandas as pd
+import os
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-import tensorflow as tf
-import matplotlib.pyplot as plt
-df = pd.read_csv("gpr_1874_1976_corrected.csv")
-df["date"] = pd.to_datetime(dict(
-    year=df.year, month=df.month, day=df.day,
-    hour=df.hour, minute=df.minute, second=df.second
-))
-df = df.dropna(subset=["latitude", "longitude", "area"])
-grouped = df.groupby("group_id")
-top_spots = grouped["area"].max().nlargest(20).index
-df_top = df[df["group_id"].isin(top_spots)]
-print(f"Selected {len(top_spots)} groups for model training.")
-df_top["time_sec"] = (df_top["date"] - df_top["date"].min()).dt.total_seconds()
-df_top["duration"] = grouped["date"].transform(lambda x: (x.max() - x.min()).days + 1)
-X = df_top[["latitude", "time_sec", "area", "duration"]].values
-longitude_rad = np.deg2rad(df_top["longitude"].values)
-y = np.column_stack((np.sin(longitude_rad), np.cos(longitude_rad)))
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-model = tf.keras.Sequential([
-    tf.keras.layers.Input(shape=(X.shape[1],)),
-    tf.keras.layers.Dense(128, activation="relu"),
-    tf.keras.layers.Dropout(0.2),
-    tf.keras.layers.Dense(128, activation="relu"),
-    tf.keras.layers.Dropout(0.2),
-    tf.keras.layers.Dense(64, activation="relu"),
-    tf.keras.layers.Dense(2, activation="linear")
-])
-model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=0.001), loss="mse")
-history = model.fit(X_train, y_train, epochs=100, batch_size=32, validation_split=0.2)
-test_loss = model.evaluate(X_test, y_test)
-print(f"Test loss: {test_loss:.4f}")
-y_pred = model.predict(X_test)
-pred_lon_rad = np.arctan2(y_pred[:,0], y_pred[:,1])
-pred_lon_deg = np.rad2deg(pred_lon_rad) % 360
-true_lon_rad = np.arctan2(y_test[:,0], y_test[:,1])
-true_lon_deg = np.rad2deg(true_lon_rad) % 360
-plt.figure(figsize=(8,6))
-plt.scatter(true_lon_deg, pred_lon_deg, alpha=0.6, color="royalblue")
-plt.plot([0, 360], [0, 360], "r--")
-plt.xlabel("True Longitude (°)")
-plt.ylabel("Predicted Longitude (°)")
-plt.title("Cyclic Longitude Prediction — Top 20 Sunspots")
-plt.xlim(0, 360)
-plt.ylim(0, 360)
-plt.savefig("analysis/true_vs_predicted_longitude.png")
-plt.figure(figsize=(8,6))
-plt.plot(history.history["loss"], label="Train loss")
-plt.plot(history.history["val_loss"], label="Validation loss")
-plt.xlabel("Epoch")
-plt.ylabel("Loss (MSE)")
-plt.legend()
-plt.title("Training Loss")
-plt.savefig("analysis/training_loss.png")
\ No newline at end of file
+from feature_store import load_features
+from figure_output import save_figure
+from lifecycle import load_lifecycle
+from mlp_runtime import export_weights
+
+
+def build_model(n_features, layers=(128, 128, 64), dropout=0.2, learning_rate=0.001):
+    """The (sin, cos) of longitude regression network, compiled with MSE loss.
+
+    Dropout follows every hidden layer but the last.
+    """
+    import tensorflow as tf
+    model = tf.keras.Sequential([tf.keras.layers.Input(shape=(n_features,))])
+    for i, width in enumerate(layers):
+        model.add(tf.keras.layers.Dense(width, activation="relu"))
+        if dropout and i < len(layers) - 1:
+            model.add(tf.keras.layers.Dropout(dropout))
+    model.add(tf.keras.layers.Dense(2, activation="linear"))
+    model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate), loss="mse")
+    return model
+
+
+def fit_predict(X_train, y_train, X_test, epochs=100, batch_size=32, seed=0, **model_params):
+    """Train a fresh network and return its (sin, cos) predictions for X_test; the walk_forward.py model interface."""
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(seed)
+    model = build_model(X_train.shape[1], **model_params)
+    model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, verbose=0)
+    return model.predict(X_test, verbose=0)
+
+
+def fit_validate(X_train, y_train, X_val, y_val, epochs=100, batch_size=32, patience=10, seed=0, **model_params):
+    """Train with early stopping on the validation loss; returns (validation predictions, epochs run).
+
+    The weights of the best epoch are restored before predicting. This is the hyper_search.py trainer.
+    """
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(seed)
+    model = build_model(X_train.shape[1], **model_params)
+    stop = tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+    history = model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, validation_data=(X_val, y_val),
+                        callbacks=[stop], verbose=0)
+    return model.predict(X_val, verbose=0), len(history.history["loss"])
+
+
+def train_longitude_model(store, lifecycle, top_n=20, epochs=100, out_dir="analysis", dpi=100):
+    """Fit the (latitude, time, area, duration) -> longitude network on the top N groups.
+
+    `store` is the FeatureStore (see feature_store.py): features are already
+    standardized, and only the rows of the top groups are read and split by group.
+    """
+    # Imported here so importing this module (or the CLI) doesn't load matplotlib
+    import matplotlib.pyplot as plt
+    top_spots = lifecycle.set_index("group_id")["peak_area"].nlargest(top_n).index.to_numpy()
+    print(f"Selected {len(top_spots)} groups for model training.")
+    X, y = store["X"], store["y"]
+    # The store's split was drawn over every group; a fresh one keeps each split non-empty for so few groups
+    splits = store.group_splits(top_spots)
+    train, val, test = splits["train"], splits["val"], splits["test"]
+    print(f"Rows per split: train {len(train)}, validation {len(val)}, test {len(test)}")
+    X_train, y_train = X[train], y[train]
+    X_test, y_test = X[test], y[test]
+    model = build_model(X.shape[1])
+    history = model.fit(X_train, y_train, epochs=epochs, batch_size=32, validation_data=(X[val], y[val]))
+    test_loss = model.evaluate(X_test, y_test)
+    print(f"Test loss: {test_loss:.4f}")
+    y_pred = model.predict(X_test)
+    pred_lon_rad = np.arctan2(y_pred[:,0], y_pred[:,1])
+    pred_lon_deg = np.rad2deg(pred_lon_rad) % 360
+    true_lon_rad = np.arctan2(y_test[:,0], y_test[:,1])
+    true_lon_deg = np.rad2deg(true_lon_rad) % 360
+    fig = plt.figure(figsize=(8,6))
+    plt.scatter(true_lon_deg, pred_lon_deg, alpha=0.6, color="royalblue")
+    plt.plot([0, 360], [0, 360], "r--")
+    plt.xlabel("True Longitude (°)")
+    plt.ylabel("Predicted Longitude (°)")
+    plt.title(f"Cyclic Longitude Prediction — Top {top_n} Sunspots")
+    plt.xlim(0, 360)
+    plt.ylim(0, 360)
+    save_figure(fig, os.path.join(out_dir, "true_vs_predicted_longitude.png"), dpi)
+    fig = plt.figure(figsize=(8,6))
+    plt.plot(history.history["loss"], label="Train loss")
+    plt.plot(history.history["val_loss"], label="Validation loss")
+    plt.xlabel("Epoch")
+    plt.ylabel("Loss (MSE)")
+    plt.legend()
+    plt.title("Training Loss")
+    save_figure(fig, os.path.join(out_dir, "training_loss.png"), dpi)
+    # Weights + scaler for mlp_runtime.py, which predicts without TensorFlow
+    print(f"Weights -> {export_weights(model, os.path.join(out_dir, 'longitude_model.npz'), store)}")
+    return model, store, test_loss
+
+
+if __name__ == "__main__":
+    train_longitude_model(load_features("gpr_1874_1976_corrected.csv"), load_lifecycle("gpr_1874_1976_corrected.csv"))
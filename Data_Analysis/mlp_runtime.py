@@ -0,0 +1,108 @@
+"""TensorFlow-free inference for the longitude network.
+
+export_weights() writes a trained Keras model's dense layers and the feature
+store's scaler into one .npz; load_mlp() reads it back into a pure-NumPy MLP whose
+predict() reproduces model.predict and whose predict_longitude() decodes the
+(sin, cos) output to degrees. Importing this module only loads NumPy, so scoring
+millions of candidate points runs in a small, fast-starting process.
+
+    python mlp_runtime.py analysis/longitude_model.npz candidates.npy --out longitudes.npy
+"""
+import argparse
+
+import numpy as np
+
+from circular import decode_longitude
+
+ACTIVATIONS = {
+    "linear": None,
+    "relu": lambda z: np.maximum(z, 0, out=z),
+    "tanh": lambda z: np.tanh(z, out=z),
+    "sigmoid": lambda z: np.divide(1, 1 + np.exp(-z), out=z),
+}
+# Rows per batch: keeps the widest hidden layer's activations to a few tens of MB
+BATCH_ROWS = 65536
+
+
+def export_weights(model, path, store=None):
+    """Save the Dense layers of a Keras model (Dropout is skipped: it is the identity at inference).
+
+    With `store`, its scaler and feature names are saved too so raw features can be scored.
+    """
+    arrays, activations = {}, []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "Dropout":
+            continue
+        if kind != "Dense":
+            raise ValueError(f"cannot export {kind} layer {layer.name!r}; only Dense and Dropout are supported")
+        activation = layer.get_config()["activation"]
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"unsupported activation {activation!r} in layer {layer.name!r}")
+        weights, bias = layer.get_weights()
+        arrays[f"W{len(activations)}"] = weights.astype(np.float32)
+        arrays[f"b{len(activations)}"] = bias.astype(np.float32)
+        activations.append(activation)
+    arrays["activations"] = np.array(activations)
+    if store is not None:
+        arrays["mean"] = np.asarray(store.mean, dtype=np.float64)
+        arrays["scale"] = np.asarray(store.scale, dtype=np.float64)
+        arrays["features"] = np.array(store.features)
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+class MLP:
+    """Dense layers as (weights, bias, activation); inputs are standardized feature rows."""
+
+    def __init__(self, layers, mean=None, scale=None, features=None):
+        self.layers = layers
+        self.mean, self.scale, self.features = mean, scale, features
+
+    @property
+    def n_features(self):
+        return self.layers[0][0].shape[0]
+
+    def standardize(self, raw):
+        if self.mean is None:
+            raise ValueError("this model was exported without a scaler; pass standardized features")
+        return ((np.asarray(raw, dtype=np.float64) - self.mean) / self.scale).astype(np.float32)
+
+    def predict(self, X, batch_rows=BATCH_ROWS, raw=False):
+        """(n, 2) float32 (sin, cos) outputs, computed in batches; `raw` rows are standardized batch by batch."""
+        out = np.empty((len(X), self.layers[-1][0].shape[1]), dtype=np.float32)
+        for start in range(0, len(X), batch_rows):
+            h = X[start:start + batch_rows]
+            h = self.standardize(h) if raw else np.asarray(h, dtype=np.float32)
+            for weights, bias, activation in self.layers:
+                h = h @ weights
+                h += bias
+                if activation is not None:
+                    activation(h)
+            out[start:start + len(h)] = h
+        return out
+
+    def predict_longitude(self, raw, batch_rows=BATCH_ROWS):
+        """Longitude in degrees [0, 360) for raw (unscaled) feature rows, in the order of `features`."""
+        return decode_longitude(self.predict(raw, batch_rows, raw=True))
+
+
+def load_mlp(path):
+    with np.load(path) as data:
+        activations = [str(a) for a in data["activations"]]
+        layers = [(data[f"W{i}"], data[f"b{i}"], ACTIVATIONS[name]) for i, name in enumerate(activations)]
+        if "mean" not in data.files:
+            return MLP(layers)
+        return MLP(layers, data["mean"], data["scale"], [str(f) for f in data["features"]])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predict longitudes with an exported network, without TensorFlow")
+    parser.add_argument("model", help=".npz written by export_weights")
+    parser.add_argument("features", help=".npy of raw feature rows (latitude, time_days, area, duration)")
+    parser.add_argument("--out", default="longitudes.npy")
+    args = parser.parse_args()
+    mlp = load_mlp(args.model)
+    longitude = mlp.predict_longitude(np.load(args.features, mmap_mode="r"))
+    np.save(args.out, longitude.astype(np.float32))
+    print(f"{len(longitude)} longitudes -> {args.out}")
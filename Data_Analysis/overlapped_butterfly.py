@@ -0,0 +1,119 @@
+#overlapped cycles: every cycle rescaled to phase 0-1 and stacked (superposed epoch)
+
+import argparse
+import numpy as np
+import pandas as pd
+from cycles import cycle_label, cycle_phase, detect_cycles
+from figure_output import save_figure
+from gpr_loader import DEFAULT_CSV, load_gpr
+from lifecycle import load_lifecycle
+
+
+def superpose(df, cycles=None, min_area=0):
+    """Spots of all cycles with their cycle phase in [0, 1) and cycle number; spots between cycles are dropped."""
+    if cycles is None:
+        cycles = detect_cycles(df)
+    spots = df[df["area"] >= min_area]
+    phase, k = cycle_phase(spots["date"].to_numpy(), cycles)
+    inside = k >= 0
+    return pd.DataFrame({
+        "phase": phase[inside],
+        "cycle": k[inside].astype(np.int16),
+        "latitude": spots["latitude"].to_numpy()[inside],
+        "area": spots["area"].to_numpy()[inside],
+        "group_id": spots["group_id"].to_numpy()[inside],
+    })
+
+
+def superpose_groups(lifecycle, cycles):
+    """Per-group peaks placed on the common cycle, one row per group."""
+    phase, k = cycle_phase(lifecycle["peak_date"].to_numpy(), cycles)
+    inside = k >= 0
+    return pd.DataFrame({
+        "phase": phase[inside],
+        "cycle": k[inside].astype(np.int16),
+        "latitude": lifecycle["peak_lat"].to_numpy()[inside],
+        "area": lifecycle["peak_area"].to_numpy()[inside],
+        "group_id": lifecycle["group_id"].to_numpy()[inside],
+    })
+
+
+def phase_stats(stacked, n_cycles, bins=20, large_area=1000):
+    """Per-phase-bin statistics of a stacked table.
+
+    Area is averaged over cycles so the curve reads as "a typical cycle";
+    large_spot_prob is the share of rows at or above `large_area`.
+    """
+    b = np.minimum((stacked["phase"].to_numpy() * bins).astype(np.int64), bins - 1)
+    lat = stacked["latitude"].to_numpy(dtype=np.float64)
+    area = stacked["area"].to_numpy(dtype=np.float64)
+    north = lat >= 0
+
+    def total(weights=None, mask=None):
+        if mask is None:
+            return np.bincount(b, weights=weights, minlength=bins)
+        return np.bincount(b[mask], weights=None if weights is None else weights[mask], minlength=bins)
+
+    n = total()
+    n_north, n_south = total(mask=north), total(mask=~north)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "phase": (np.arange(bins) + 0.5) / bins,
+            "n": n,
+            "mean_abs_lat": total(np.abs(lat)) / n,
+            "mean_lat_north": total(lat, north) / n_north,
+            "mean_lat_south": total(lat, ~north) / n_south,
+            "area_per_cycle": total(area) / n_cycles,
+            "large_spot_prob": total(mask=area >= large_area) / n,
+        })
+
+
+def plot_overlap(stacked, stats, cycles, out_path="analysis/overlapped_butterfly.png", bins=100, dpi=300):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    lat_edges = np.arange(-50, 51)
+    phase_edges = np.linspace(0, 1, bins + 1)
+    grid = np.histogram2d(stacked["phase"], stacked["latitude"], bins=[phase_edges, lat_edges],
+                          weights=stacked["area"])[0]
+    image = np.ma.masked_less_equal(grid.T, 0)
+
+    fig, axes = plt.subplots(2, 1, figsize=(12, 10), sharex=True, layout="constrained",
+                             gridspec_kw={"height_ratios": [3, 2]})
+    im = axes[0].imshow(image, origin="lower", aspect="auto", cmap="plasma", interpolation="nearest",
+                        norm=LogNorm() if image.count() else None, extent=(0, 1, lat_edges[0], lat_edges[-1]))
+    fig.colorbar(im, ax=list(axes), label="Total area (µHem)", shrink=0.6, anchor=(0, 1))
+    axes[0].plot(stats["phase"], stats["mean_lat_north"], color="cyan", label="Mean latitude (N/S)")
+    axes[0].plot(stats["phase"], stats["mean_lat_south"], color="cyan")
+    axes[0].set_title(f"Overlapped Butterfly Diagram ({len(cycles)} cycles, "
+                      f"{cycle_label(cycles[0][0], cycles[-1][1])})")
+    axes[0].set_ylabel("Latitude")
+    axes[0].legend(loc="upper right")
+
+    width = stats["phase"].iloc[1] - stats["phase"].iloc[0] if len(stats) > 1 else 1
+    axes[1].bar(stats["phase"], stats["area_per_cycle"], width=width * 0.9, color="orange", label="Area per cycle")
+    axes[1].set_ylabel("Area per cycle (µHem)")
+    axes[1].set_xlabel("Cycle phase (minimum → minimum)")
+    prob = axes[1].twinx()
+    prob.plot(stats["phase"], stats["large_spot_prob"], color="black", marker="o", label="P(large spot)")
+    prob.set_ylabel("Large-spot probability")
+    save_figure(fig, out_path, dpi)
+
+
+def overlap(df, lifecycle, out_path="analysis/overlapped_butterfly.png", min_area=50, bins=20, large_area=1000,
+            groups=False, dpi=300):
+    """Stack all detected cycles, save the combined figure and return the per-phase statistics."""
+    cycles = detect_cycles(df)
+    stacked = superpose_groups(lifecycle, cycles) if groups else superpose(df, cycles, min_area)
+    stats = phase_stats(stacked, len(cycles), bins=bins, large_area=large_area)
+    plot_overlap(stacked, stats, cycles, out_path, dpi=dpi)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Superposed-epoch (overlapped) butterfly diagram")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", default="analysis/overlapped_butterfly.png")
+    parser.add_argument("--groups", action="store_true", help="stack group peaks instead of every spot")
+    args = parser.parse_args()
+    print(overlap(load_gpr(args.csv), load_lifecycle(args.csv), args.out, groups=args.groups).to_string(index=False))
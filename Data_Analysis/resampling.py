@@ -0,0 +1,89 @@
+"""Bootstrap confidence intervals and permutation p-values for the area -> duration slope.
+
+Resamples are drawn as index matrices (one row per resample) and fitted with the
+row-batched closed-form fit from regression.py, so thousands of resamples are a
+handful of array operations. Every cycle gets its own child of one SeedSequence,
+which keeps results identical whether the cycles run serially or in a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cycles import cycle_label
+from regression import area_duration_sample, fit_lines
+
+# Resample rows fitted per batch: bounds the index matrix at about this many elements
+BATCH_ELEMENTS = 5_000_000
+
+
+def _batches(n_resamples, n):
+    size = max(1, BATCH_ELEMENTS // max(n, 1))
+    for start in range(0, n_resamples, size):
+        yield min(size, n_resamples - start)
+
+
+def bootstrap_slopes(x, y, n_resamples=2000, rng=None):
+    """Slopes of `n_resamples` case-resampled fits (rows drawn with replacement)."""
+    rng = np.random.default_rng(rng)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    slopes = []
+    for size in _batches(n_resamples, len(x)):
+        idx = rng.integers(0, len(x), size=(size, len(x)))
+        slopes.append(fit_lines(x[idx], y[idx])["slope"])
+    return np.concatenate(slopes) if slopes else np.empty(0)
+
+
+def permutation_slopes(x, y, n_permutations=2000, rng=None):
+    """Slopes after shuffling y against x, i.e. under "no relationship"."""
+    rng = np.random.default_rng(rng)
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    slopes = []
+    for size in _batches(n_permutations, len(x)):
+        shuffled = rng.permuted(np.broadcast_to(y, (size, len(y))), axis=1)
+        slopes.append(fit_lines(np.broadcast_to(x, shuffled.shape), shuffled)["slope"])
+    return np.concatenate(slopes) if slopes else np.empty(0)
+
+
+def slope_test(x, y, n_resamples=2000, level=0.95, seed=None):
+    """Slope with its bootstrap percentile interval and two-sided permutation p-value, as a dict.
+
+    `seed` is an int or a SeedSequence.
+    """
+    seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    boot_seed, perm_seed = seq.spawn(2)
+    slope = float(fit_lines(x, y)["slope"]) if len(x) >= 2 else np.nan
+    if len(x) < 3:
+        return {"n": len(x), "slope": slope, "ci_low": np.nan, "ci_high": np.nan, "boot_se": np.nan, "p_value": np.nan}
+    boot = bootstrap_slopes(x, y, n_resamples, np.random.default_rng(boot_seed))
+    perm = permutation_slopes(x, y, n_resamples, np.random.default_rng(perm_seed))
+    alpha = (1 - level) / 2
+    ci_low, ci_high = np.nanquantile(boot, [alpha, 1 - alpha])
+    # +1 counts the observed slope itself, so p is never exactly 0
+    p_value = (1 + np.sum(np.abs(perm) >= abs(slope))) / (1 + len(perm))
+    return {"n": len(x), "slope": slope, "ci_low": ci_low, "ci_high": ci_high,
+            "boot_se": np.nanstd(boot, ddof=1), "p_value": p_value}
+
+
+def _slope_test_job(job):
+    x, y, n_resamples, level, seed = job
+    return slope_test(x, y, n_resamples, level, seed)
+
+
+def slope_significance(lifecycle, cycles, n_resamples=2000, level=0.95, seed=0, workers=1,
+                       min_area=500, min_duration=7, max_duration=100):
+    """Bootstrap CI and permutation p-value of the slope for every cycle and for all cycles pooled."""
+    x, y, k = area_duration_sample(lifecycle, cycles, min_area, min_duration, max_duration)
+    labels = [cycle_label(start, end) for start, end in cycles] + ["all"]
+    seeds = np.random.SeedSequence(seed).spawn(len(labels))
+    jobs = [(x[k == i], y[k == i], n_resamples, level, seeds[i]) for i in range(len(cycles))]
+    jobs.append((x, y, n_resamples, level, seeds[-1]))
+
+    if workers <= 1:
+        results = list(map(_slope_test_job, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_slope_test_job, jobs))
+    table = pd.DataFrame(results)
+    table.insert(0, "cycle", labels)
+    return table
@@ -0,0 +1,273 @@
+"""Run several Data_Analysis steps in one process, sharing a single loaded catalog.
+
+    python run_analysis.py butterfly regression cycles --dpi 150 --workers 4
+"""
+import argparse
+import importlib
+import os
+
+# Only the standard library is imported up front: pandas, matplotlib, sklearn and
+# TensorFlow are loaded by the analyses that need them, so `--help` and quick
+# queries like `summary` start fast.
+DEFAULT_CSV = "gpr_1874_1976_corrected.csv"
+
+
+class Session:
+    """Catalog and derived tables, loaded on first use and shared by every analysis."""
+
+    def __init__(self, args):
+        self.args = args
+        self._df = None
+        self._lifecycle = None
+
+    @property
+    def df(self):
+        if self._df is None:
+            from gpr_loader import load_gpr
+            self._df = load_gpr(self.args.csv)
+        return self._df
+
+    @property
+    def lifecycle(self):
+        if self._lifecycle is None:
+            from lifecycle import load_lifecycle
+            self._lifecycle = load_lifecycle(self.args.csv)
+        return self._lifecycle
+
+    def out(self, name):
+        return os.path.join(self.args.out, name)
+
+
+def run_summary(s):
+    lc = s.lifecycle
+    print(f"Catalog: {s.args.csv}")
+    print(f"  groups: {len(lc)}, observations: {int(lc['n_obs'].sum())}")
+    print(f"  span: {lc['first_seen'].min()} -> {lc['last_seen'].max()}")
+    print(f"  median duration: {lc['duration_days'].median():.0f} days "
+          f"({(lc['n_passages'] > 1).sum()} groups seen on more than one disk passage)")
+    print(f"  median growth / decay: {lc['growth_rate'].median():.1f} / {lc['decay_rate'].median():.1f} µHem/day")
+    from cycles import detect_cycles
+    cycles = detect_cycles(s.df)
+    print(f"Detected {len(cycles)} solar cycles (minimum to minimum):")
+    for start, end in cycles:
+        print(f"  {start:%Y-%m} -> {end:%Y-%m}")
+    print(f"Top {s.args.top_n} groups by peak area:")
+    top = lc.nlargest(s.args.top_n, "peak_area")
+    for row in top.itertuples():
+        print(f"  group {row.group_id}: {row.peak_area:.0f} µHem on {row.peak_date:%Y-%m-%d} "
+              f"at lat {row.peak_lat:+.1f}, lon {row.peak_lon:.1f} ({row.duration_days} days)")
+
+
+def run_ingest(s):
+    # Streams the CSV in chunks instead of loading it, for catalogs larger than memory
+    from stream_store import ingest_csv, iter_store, stream_lifecycle
+    meta = ingest_csv(s.args.csv, s.args.store, chunksize=s.args.chunksize)
+    print(f"Store {s.args.store}: {meta['rows']} rows, years {meta['years'][0]}-{meta['years'][-1]}")
+    lc = stream_lifecycle(iter_store(s.args.store, columns=["group_id", "date", "area", "latitude", "longitude"]))
+    print(f"  {len(lc)} groups, median duration {lc['duration_days'].median():.0f} days")
+
+
+def run_butterfly(s):
+    from butterfly import plot_butterfly
+    if s.args.raster:
+        plot_butterfly(s.df, s.out("butterfly_diagram.png"), min_area=s.args.min_area, dpi=s.args.dpi,
+                       raster=True, lifecycle=s.lifecycle, top_n=s.args.top_n)
+    else:
+        plot_butterfly(s.df, s.out("butterfly_diagram.png"), min_area=s.args.min_area, dpi=s.args.dpi)
+
+
+def run_regression(s):
+    from linear_reg import plot_area_duration
+    slope, intercept, r2 = plot_area_duration(
+        s.lifecycle, s.out("linear_regression_area_duration.png"),
+        min_area=s.args.regression_area, min_duration=s.args.min_duration,
+        max_duration=s.args.max_duration, dpi=s.args.dpi)
+    print(f"Area vs duration: y = {slope:.5f}x + {intercept:.2f}, R² = {r2:.3f}")
+    from cycles import detect_cycles
+    from regression import fit_cycles
+    per_cycle = fit_cycles(s.lifecycle, detect_cycles(s.df), min_area=s.args.regression_area,
+                           min_duration=s.args.min_duration, max_duration=s.args.max_duration)
+    print(per_cycle.to_string(index=False, float_format="%.5g"))
+
+
+def run_significance(s):
+    from cycles import detect_cycles
+    from resampling import slope_significance
+    table = slope_significance(s.lifecycle, detect_cycles(s.df), n_resamples=s.args.resamples, seed=s.args.seed,
+                               workers=s.args.workers, min_area=s.args.regression_area,
+                               min_duration=s.args.min_duration, max_duration=s.args.max_duration)
+    print(f"Area -> duration slope: 95% bootstrap interval and permutation p-value ({s.args.resamples} resamples)")
+    print(table.to_string(index=False, float_format="%.4g"))
+
+
+def run_cycles(s):
+    import single_cycle_analysis
+    params = dict(single_cycle_analysis.PLOT_PARAMS,
+                  min_area=s.args.min_area, regression_area=s.args.regression_area,
+                  min_duration=s.args.min_duration, max_duration=s.args.max_duration,
+                  top_n=s.args.top_n, raster=s.args.raster)
+    # Pool workers read the same cached tables themselves; only a serial run reuses the session's copies
+    data = dict(df=s.df, lifecycle=s.lifecycle) if s.args.workers <= 1 else {}
+    single_cycle_analysis.run(s.args.csv, workers=s.args.workers, dpi=s.args.dpi, params=params,
+                              force=s.args.force, out_dir=s.args.out, **data)
+
+
+def run_overlap(s):
+    from overlapped_butterfly import overlap
+    stats = overlap(s.df, s.lifecycle, s.out("overlapped_butterfly.png"), min_area=s.args.min_area, dpi=s.args.dpi)
+    print(stats.to_string(index=False, float_format="%.3f"))
+
+
+def run_longitude(s):
+    from long_vs_time import plot_longitude_time
+    if s.args.frame == "corotating":
+        from carrington import with_carrington
+        plot_longitude_time(with_carrington(s.df, s.args.csv), s.out("long_vs_time_corotating.png"),
+                            dpi=s.args.dpi, column="corotating_longitude")
+    else:
+        plot_longitude_time(s.df, s.out("long_vs_time.png"), dpi=s.args.dpi)
+
+
+def run_heatmap(s):
+    # 3d_sun.py isn't a valid identifier, so it can only be imported by name
+    sun = importlib.import_module("3d_sun")
+    sun.plot_top_spots(s.df, out_path=s.out("top_spots_per_cycle.png"),
+                       min_area=s.args.min_area, top_n=s.args.top_n, dpi=s.args.dpi)
+
+
+def run_density(s):
+    from density_cube import densest_regions, load_density_cube, plot_density
+    cube, info = load_density_cube(s.args.csv, min_area=s.args.min_area)
+    plot_density(cube, info, s.out("density_lat_lon.png"), dpi=s.args.dpi)
+    print("Densest latitude/longitude regions (total area, all cycles):")
+    for lat_lo, lat_hi, lon_lo, lon_hi, total in densest_regions(cube, info):
+        print(f"  lat {lat_lo:+.0f}..{lat_hi:+.0f}, lon {lon_lo:.0f}..{lon_hi:.0f}: {total:.0f} µHem")
+
+
+def run_hotspots(s):
+    from sun_hotspots import export_hotspots
+    path = export_hotspots(s.df, s.args.csv, s.out("sun_hotspots.gltf"), top_n=s.args.top_n, min_area=s.args.min_area)
+    print(f"Sphere mesh for the web simulation -> {path}")
+
+
+def run_predict(s):
+    from feature_store import load_features
+    from long_prediction import train_longitude_model
+    train_longitude_model(load_features(s.args.csv), s.lifecycle, top_n=s.args.predict_top_n, epochs=s.args.epochs,
+                          out_dir=s.args.out, dpi=s.args.dpi)
+
+
+def run_walkforward(s):
+    from cycles import detect_cycles
+    from long_prediction import fit_predict
+    from walk_forward import top_groups_per_cycle, walk_forward
+    groups = top_groups_per_cycle(s.lifecycle, detect_cycles(s.df), s.args.predict_top_n)
+    table = walk_forward(fit_predict, s.args.csv, params={"epochs": s.args.epochs, "seed": s.args.seed},
+                         groups=groups, workers=s.args.workers, threads=s.args.threads)
+    print("Walk-forward longitude error (train on earlier cycles, test on the next; degrees):")
+    print(table.to_string(index=False, float_format="%.1f"))
+
+
+def run_search(s):
+    from cycles import detect_cycles
+    from hyper_search import sample_configs, search
+    from walk_forward import top_groups_per_cycle
+    groups = top_groups_per_cycle(s.lifecycle, detect_cycles(s.df), s.args.predict_top_n)
+    table = search(s.args.csv, configs=sample_configs(n_configs=s.args.trials, seed=s.args.seed), groups=groups,
+                   min_epochs=max(1, s.args.epochs // 9), max_epochs=s.args.epochs, seed=s.args.seed,
+                   workers=s.args.workers, threads=s.args.threads)
+    print("Best configurations (validation mean angular error, degrees):")
+    print(table.head(10).to_string(index=False, float_format="%.4g"))
+
+
+def run_baselines(s):
+    from baselines import BASELINES, score_baselines
+    from cycles import detect_cycles
+    from walk_forward import top_groups_per_cycle, walk_forward
+    print("Baselines on the feature store's test split (angular error, degrees; random guessing scores 90):")
+    print(score_baselines(s.args.csv).to_string(index=False, float_format="%.2f"))
+    groups = top_groups_per_cycle(s.lifecycle, detect_cycles(s.df), s.args.predict_top_n)
+    print(f"Walk-forward on the top {s.args.predict_top_n} groups per cycle (compare with `walkforward`):")
+    for name, fit_predict in BASELINES.items():
+        pooled = walk_forward(fit_predict, s.args.csv, groups=groups, workers=s.args.workers,
+                              threads=s.args.threads, standardize=False).iloc[-1]
+        print(f"  {name:<15} mean {pooled['mean_error']:5.1f}°, median {pooled['median_error']:5.1f}°")
+
+
+ANALYSES = {
+    "summary": run_summary,
+    "ingest": run_ingest,
+    "butterfly": run_butterfly,
+    "regression": run_regression,
+    "significance": run_significance,
+    "cycles": run_cycles,
+    "overlap": run_overlap,
+    "longitude": run_longitude,
+    "heatmap": run_heatmap,
+    "density": run_density,
+    "hotspots": run_hotspots,
+    "predict": run_predict,
+    "walkforward": run_walkforward,
+    "search": run_search,
+    "baselines": run_baselines,
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Sunspot catalog analyses")
+    parser.add_argument("analyses", nargs="+", choices=list(ANALYSES),
+                        help="analyses to run, in order")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="GPR catalog CSV")
+    parser.add_argument("--out", default="analysis", help="output directory")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--min-area", type=float, default=50,
+                        help="smallest spot area plotted (µHem)")
+    parser.add_argument("--regression-area", type=float, default=500,
+                        help="groups must exceed this peak area to enter the area/duration fit")
+    parser.add_argument("--min-duration", type=int, default=7)
+    parser.add_argument("--max-duration", type=int, default=100)
+    parser.add_argument("--top-n", type=int, default=10, help="highlighted groups per cycle")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="render processes for the cycle figures (1 = serial)")
+    parser.add_argument("--raster", action="store_true",
+                        help="draw butterfly diagrams as binned images (constant cost for any catalog size)")
+    parser.add_argument("--formats", default="png",
+                        help="comma-separated figure variants written from one render: "
+                             "png (full size), webp (web size), thumb, svg")
+    parser.add_argument("--force", action="store_true", help="re-render unchanged cycle figures")
+    parser.add_argument("--resamples", type=int, default=2000,
+                        help="bootstrap resamples and permutations per slope test")
+    parser.add_argument("--seed", type=int, default=0, help="seed for resampling (results don't depend on --workers)")
+    parser.add_argument("--frame", choices=["carrington", "corotating"], default="carrington",
+                        help="longitude frame for `longitude`: catalog Carrington longitudes, or with "
+                             "differential rotation removed (carrington.py)")
+    parser.add_argument("--predict-top-n", type=int, default=20, help="groups used to train the longitude model")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--trials", type=int, default=24,
+                        help="network configurations tried by `search` (successive halving up to --epochs)")
+    parser.add_argument("--threads", type=int, default=1,
+                        help="BLAS/TensorFlow threads per walk-forward or search worker (--workers run at once)")
+    parser.add_argument("--store", default="catalog_store",
+                        help="year-partitioned store written by `ingest`")
+    parser.add_argument("--chunksize", type=int, default=500_000, help="CSV rows per ingest chunk")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.out, exist_ok=True)
+    # Batch run: figures are only ever written to files
+    from figure_output import configure_output, use_headless, write_index
+    use_headless()
+    configure_output(args.formats.split(","))
+    session = Session(args)
+    try:
+        for name in args.analyses:
+            print(f"== {name}")
+            ANALYSES[name](session)
+    finally:
+        write_index(os.path.join(args.out, "figures.json"))
+
+
+if __name__ == "__main__":
+    main()
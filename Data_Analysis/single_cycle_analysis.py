@@ -1059,240 +1059,418 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from sklearn.linear_model import LinearRegression
+import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from build_manifest import BuildManifest, hash_inputs
+from butterfly_raster import butterfly_histogram, draw_butterfly_raster, month_edges
+from cycles import cycle_label, detect_cycles
+from figure_output import configure_output, output_variants, save_figure, use_headless, variant_path, write_index
+from gpr_loader import load_gpr, time_slice
+from lifecycle import MAX_GAP_DAYS, load_lifecycle, groups_peaking_in
+from regression import confidence_band, fit_lines, format_equation
+from time_axis import decimal_year
 
-# LOAD DATA
-df = pd.read_csv("gpr_1874_1976_corrected.csv")
-
-# Convert date/time into datetime
-df["date"] = pd.to_datetime(dict(
-    year=df.year, month=df.month, day=df.day,
-    hour=df.hour, minute=df.minute, second=df.second
-))
-
-# SOLAR CYCLES 1879-1976 chosen manually
-solar_cycles = [
-    (1879, 1890), (1890, 1901), (1901, 1912), (1912, 1923),
-    (1923, 1934), (1934, 1944), (1944, 1955), (1955, 1966),
-    (1966, 1977)
-]
-
-# Output folders
-integrated_folder = "analysis/solar_cycles_plots"
-butterfly_folder = "analysis/Butterfly_Diagrams"
-regression_folder = "analysis/Regression_Plots"
-bar_folder = "analysis/Bar_Plots"
-
-os.makedirs(integrated_folder, exist_ok=True)
-os.makedirs(butterfly_folder, exist_ok=True)
-os.makedirs(regression_folder, exist_ok=True)
-os.makedirs(bar_folder, exist_ok=True)
-
-# LOOP OVER CYCLES
-for start_year, end_year in solar_cycles:
-    cycle_start = pd.Timestamp(f"{start_year}-01-01")
-    cycle_end = pd.Timestamp(f"{end_year}-12-31")
-    df_cycle = df[(df["date"] >= cycle_start) & (df["date"] <= cycle_end)]
+CSV_PATH = "gpr_1874_1976_corrected.csv"
+
+# SOLAR CYCLES are detected from the smoothed monthly area (see cycles.py);
+# run() also accepts an explicit list of (start, end) Timestamps.
+
+# Output folders (inside the output directory, "analysis" by default)
+integrated_folder = "solar_cycles_plots"
+butterfly_folder = "Butterfly_Diagrams"
+regression_folder = "Regression_Plots"
+bar_folder = "Bar_Plots"
+
+# Thresholds and styling shared by all cycle figures
+PLOT_PARAMS = {
+    "min_area": 50,          # spots drawn in the butterfly diagram
+    "regression_area": 500,  # groups used for the area/duration fit
+    "min_duration": 7,
+    "max_duration": 100,
+    "top_n": 10,
+    "cmap": "inferno_r",
+    "raster": False,         # bin all spots into a month × 1° image instead of scattering them
+}
+# Bump when the drawing code changes so the build manifest re-renders everything
+RENDER_VERSION = 5
+
+
+def cycle_input_hash(df, lifecycle, cycle_start, cycle_end):
+    """Hash of the catalog rows and group stats one cycle's figures are drawn from."""
+    df_cycle = time_slice(df, cycle_start, cycle_end)
+    return hash_inputs(
+        df_cycle[["group_id", "date", "area", "latitude"]],
+        groups_peaking_in(lifecycle, cycle_start, cycle_end),
+    )
+
+
+def prepare_cycle(df, lifecycle, cycle_start, cycle_end, params=PLOT_PARAMS):
+    """Everything the four figures of one cycle need, or None if the cycle has no data."""
+    label = cycle_label(cycle_start, cycle_end)
+    df_cycle = time_slice(df, cycle_start, cycle_end)
 
     if df_cycle.empty:
-        print(f"No data for cycle {start_year}-{end_year}, skipping...")
-        continue
+        print(f"No data for cycle {label}, skipping...")
+        return None
 
     # Max area per sunspot group
-    records = []
-    for group_id, g in df_cycle.groupby("group_id"):
-        if g.empty:
-            continue
-        max_area = g["area"].max()
-        peak_row = g[g["area"] == max_area].iloc[0]
-        duration = len(g)
-        records.append((group_id, peak_row["date"], max_area, peak_row["latitude"], duration))
-    sun_cycle_df = pd.DataFrame(records, columns=["group_id", "date", "area", "latitude", "duration"])
+    cycle_groups = groups_peaking_in(lifecycle, cycle_start, cycle_end).reset_index(drop=True)
+    sun_cycle_df = pd.DataFrame({
+        "group_id": cycle_groups["group_id"],
+        "date": cycle_groups["peak_date"],
+        "area": cycle_groups["peak_area"],
+        "latitude": cycle_groups["peak_lat"],
+        "duration": cycle_groups["duration_days"],
+    })
 
     if sun_cycle_df.empty:
-        print(f"No sunspots for cycle {start_year}-{end_year}, skipping...")
-        continue
+        print(f"No sunspots for cycle {label}, skipping...")
+        return None
 
     sun_cycle_df["days_since_start"] = (sun_cycle_df["date"] - cycle_start).dt.days
 
     # Butterfly diagram data
-    x_butterfly, lat_butterfly, area_butterfly = [], [], []
-    for _, row in df_cycle.iterrows():
-        if row["area"] >= 50:
-            time_val = (
-                row.date.year + row.date.month / 12 + row.date.day / 365 +
-                row.date.hour / (24 * 365) + row.date.minute / (24 * 365 * 60) + row.date.second / (24 * 365 * 3600)
-            )
-            x_butterfly.append(time_val)
-            lat_butterfly.append(row.latitude)
-            area_butterfly.append(row.area)
-
-    # Pick Top 10 biggest sunspots
-    topN = sun_cycle_df.nlargest(10, "area")
+    spots = df_cycle[df_cycle["area"] >= params["min_area"]]
+    x_butterfly = decimal_year(spots["date"])
+    lat_butterfly = spots["latitude"].to_numpy()
+    area_butterfly = spots["area"].to_numpy()
+    butterfly_grid = None
+    if params.get("raster"):
+        t_edges = month_edges(cycle_start, cycle_end)
+        lat_edges = np.arange(-50, 51)
+        butterfly_grid = (butterfly_histogram(spots["date"].to_numpy(), lat_butterfly, area_butterfly,
+                                              t_edges, lat_edges)[0], t_edges, lat_edges)
+
+    # Pick Top N biggest sunspots
+    topN = sun_cycle_df.nlargest(params["top_n"], "area")
+    topN["year_frac"] = decimal_year(topN["date"])
 
     # Color mapping: bigger area → darker color
-    cmap = plt.cm.inferno_r
+    cmap = plt.get_cmap(params["cmap"])
     norm = plt.Normalize(vmin=topN["area"].min(), vmax=topN["area"].max())
     color_map = {idx: cmap(norm(area)) for idx, area in zip(topN.index, topN["area"])}
 
-    # --- FIGURE 1: Butterfly Diagram ---
-    fig_butterfly, ax_butterfly = plt.subplots(figsize=(14, 10))
-    ax_butterfly.scatter(x_butterfly, lat_butterfly,
-                         s=np.array(area_butterfly) / 50,
-                         color="lightblue", alpha=0.5, label="All Spots")
+    # Regression data
+    sun_df = pd.DataFrame({"area": cycle_groups["peak_area"], "duration": cycle_groups["duration_days"]})
+    sun_df = sun_df[(sun_df["area"] > params["regression_area"])
+                    & (sun_df["duration"] > params["min_duration"])
+                    & (sun_df["duration"] <= params["max_duration"])]
+    x_fit = y_fit = y_band = equation_text = None
+    if not sun_df.empty:
+        X = sun_df["area"].to_numpy()
+        fit = fit_lines(X, sun_df["duration"].to_numpy())
+        x_fit = np.linspace(X.min(), X.max(), 200)
+        y_fit, lo, hi = confidence_band(fit, x_fit)
+        y_band = (lo, hi)
+        equation_text = format_equation(fit["slope"], fit["intercept"], fit["r2"])
 
+    # Bar colors: top spots highlighted
+    colors = ["lightgray"] * len(sun_cycle_df)
     for idx in topN.index:
-        spot = topN.loc[idx]
-        ax_butterfly.scatter(
-            spot["date"].year + spot["date"].month / 12 + spot["date"].day / 365,
-            spot["latitude"],
-            s=spot["area"] / 40,
-            color=color_map[idx],
-            edgecolor="black",
-            alpha=0.9,
-            label=f"Group{spot['group_id']} ({spot['date'].date()})"
-        )
-
-    ax_butterfly.set_title(f"Butterfly Diagram (Solar Cycle {start_year}-{end_year})", fontsize=16)
-    ax_butterfly.set_xlabel("Year (fractional)", fontsize=12)
-    ax_butterfly.set_ylabel("Latitude", fontsize=12)
-    ax_butterfly.legend(fontsize=8)
-
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    cbar = fig_butterfly.colorbar(sm, ax=ax_butterfly)
-    cbar.set_label('Sunspot Area (µHem)', fontsize=12)
-
-    butterfly_path = os.path.join(butterfly_folder, f"butterfly_cycle_{start_year}-{end_year}.png")
-    plt.savefig(butterfly_path, dpi=300)
-    plt.close(fig_butterfly)
+        colors[sun_cycle_df.index.get_loc(idx)] = color_map[idx]
 
-    # --- FIGURE 2: Regression ---
-    sunspots = []
-    for group_id, g in df_cycle.groupby("group_id"):
-        if g.empty:
-            continue
-        duration = (g["date"].max() - g["date"].min()).days + 1
-        max_area = g["area"].max()
-        if max_area > 0 and duration > 0:
-            sunspots.append((max_area, duration))
-    sun_df = pd.DataFrame(sunspots, columns=["area", "duration"])
-    sun_df = sun_df[(sun_df["area"] > 500) & (sun_df["duration"] > 7) & (sun_df["duration"] <= 100)]
-
-    fig_regression, ax_regression = plt.subplots(figsize=(10, 6))
-    if not sun_df.empty:
-        X = sun_df[["area"]].values
-        y = sun_df["duration"].values
-        model = LinearRegression()
-        model.fit(X, y)
-        x_fit = np.linspace(X.min(), X.max(), 200).reshape(-1, 1)
-        y_fit = model.predict(x_fit)
-        slope = model.coef_[0]
-        intercept = model.intercept_
-        r2 = model.score(X, y)
-        equation_text = f"y = {slope:.5f}x + {intercept:.2f}, R² = {r2:.3f}"
-
-        ax_regression.scatter(sun_df["area"], sun_df["duration"], s=10, alpha=0.5, color="lightblue", label="Sunspots")
+    return {
+        "label": label, "start": cycle_start, "end": cycle_end,
+        "sun_cycle_df": sun_cycle_df, "topN": topN,
+        "x_butterfly": x_butterfly, "lat_butterfly": lat_butterfly, "area_butterfly": area_butterfly,
+        "butterfly_grid": butterfly_grid,
+        "cmap": cmap, "norm": norm, "color_map": color_map,
+        "sun_df": sun_df, "x_fit": x_fit, "y_fit": y_fit, "y_band": y_band, "equation_text": equation_text,
+        "colors": colors,
+    }
+
+
+class Panel:
+    """Static parts of one axes (labels, reference lines, colorbar), built once and reused for every cycle.
+
+    draw() removes the previous cycle's data artists and adds the new ones, so a
+    batch run pays for figure, axes and colorbar construction only once per process.
+    """
+    title = ""
+
+    def __init__(self, fig, ax, params):
+        self.ax = ax
+        self.artists = []
+        self.title_text = ax.set_title("", fontsize=16)
+        # Colour scale of the top-N groups; its limits follow each cycle
+        self.mappable = plt.cm.ScalarMappable(cmap=plt.get_cmap(params["cmap"]), norm=plt.Normalize(0, 1))
+        self.colorbar = fig.colorbar(self.mappable, ax=ax)
+        self.colorbar.set_label("Sunspot Area (µHem)", fontsize=12)
 
+    def clear(self):
+        for artist in self.artists:
+            artist.remove()
+        self.artists = []
+        if self.ax.get_legend() is not None:
+            self.ax.get_legend().remove()
+        # Limits come from the new cycle's data only
+        self.ax.relim()
+
+    def draw(self, c):
+        self.clear()
+        self.mappable.set_clim(c["norm"].vmin, c["norm"].vmax)
+        self.title_text.set_text(self.title.format(label=c["label"]))
+        self.draw_data(c)
+
+    def add(self, artist):
+        self.artists.append(artist)
+        return artist
+
+    def draw_data(self, c):
+        raise NotImplementedError
+
+
+class ButterflyPanel(Panel):
+    title = "Butterfly Diagram (Solar Cycle {label})"
+
+    def __init__(self, fig, ax, params):
+        super().__init__(fig, ax, params)
+        ax.set_xlabel("Year (fractional)", fontsize=12)
+        ax.set_ylabel("Latitude", fontsize=12)
+        ax.axhline(0, color="gray", linestyle="--", linewidth=0.8, alpha=0.5)
+        for lat in (30, -30):
+            ax.axhline(lat, color="red", linestyle=":", linewidth=0.8, alpha=0.4)
+        ax.set_ylim(-50, 50)
+
+    def draw_data(self, c):
+        ax = self.ax
+        if c["butterfly_grid"] is not None:
+            self.add(draw_butterfly_raster(ax, *c["butterfly_grid"], cmap="Blues"))
+        else:
+            self.add(ax.scatter(c["x_butterfly"], c["lat_butterfly"],
+                                s=c["area_butterfly"] / 50,
+                                color="lightblue", alpha=0.5, label="All Spots"))
+        topN = c["topN"]
+        for idx in topN.index:
+            spot = topN.loc[idx]
+            self.add(ax.scatter(
+                spot["year_frac"],
+                spot["latitude"],
+                s=spot["area"] / 40,
+                color=c["color_map"][idx],
+                edgecolor="black",
+                alpha=0.9,
+                label=f"Group{spot['group_id']} ({spot['date'].date()})"
+            ))
+        ax.set_xlim(decimal_year([c["start"], c["end"]]))
+        ax.legend(fontsize=8)
+
+
+class RegressionPanel(Panel):
+    title = "Sunspot Area vs Duration (Solar Cycle {label})"
+
+    def __init__(self, fig, ax, params):
+        super().__init__(fig, ax, params)
+        ax.set_xlabel("Max Area (µHem)", fontsize=12)
+        ax.set_ylabel("Duration (days)", fontsize=12)
+
+    def draw_data(self, c):
+        ax = self.ax
+        sun_df, topN = c["sun_df"], c["topN"]
+        if sun_df.empty:
+            # Fixed limits, not whatever the previous cycle left behind
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 100)
+            return
+        self.add(ax.scatter(sun_df["area"], sun_df["duration"], s=10, alpha=0.5, color="lightblue",
+                            label="Sunspots"))
         for idx in topN.index:
             match = sun_df[sun_df["area"] == topN.loc[idx]["area"]]
             if not match.empty:
-                ax_regression.scatter(match["area"], match["duration"], s=50,
-                                      color=color_map[idx], edgecolor="black",
-                                      label=f"Group{topN.loc[idx]['group_id']} ({topN.loc[idx]['date'].date()})")
-
-        ax_regression.plot(x_fit, y_fit, color="red", linewidth=2, label=equation_text)
-        ax_regression.set_ylim(0, 100)
-        ax_regression.set_xlabel("Max Area (µHem)", fontsize=12)
-        ax_regression.set_ylabel("Duration (days)", fontsize=12)
-        ax_regression.set_title(f"Sunspot Area vs Duration (Solar Cycle {start_year}-{end_year})", fontsize=16)
-        ax_regression.legend(fontsize=8)
-
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    cbar = fig_regression.colorbar(sm, ax=ax_regression)
-    cbar.set_label('Sunspot Area (µHem)', fontsize=12)
-
-    regression_path = os.path.join(regression_folder, f"regression_cycle_{start_year}-{end_year}.png")
-    plt.savefig(regression_path, dpi=300)
-    plt.close(fig_regression)
+                self.add(ax.scatter(match["area"], match["duration"], s=50,
+                                    color=c["color_map"][idx], edgecolor="black",
+                                    label=f"Group{topN.loc[idx]['group_id']} ({topN.loc[idx]['date'].date()})"))
+        self.add(ax.plot(c["x_fit"], c["y_fit"], color="red", linewidth=2, label=c["equation_text"])[0])
+        if not np.isnan(c["y_band"][0]).all():
+            self.add(ax.fill_between(c["x_fit"], *c["y_band"], color="red", alpha=0.15))
+        ax.autoscale(axis="x")
+        ax.set_ylim(0, 100)
+        ax.legend(fontsize=8)
 
-    # --- FIGURE 3: Bar Plot ---
-    fig_bar, ax_bar = plt.subplots(figsize=(14, 10))
-    colors = ["lightgray"] * len(sun_cycle_df)
-    for idx in topN.index:
-        colors[sun_cycle_df.index.get_loc(idx)] = color_map[idx]
 
-    ax_bar.bar(sun_cycle_df["days_since_start"], sun_cycle_df["area"],
-               width=20, alpha=0.6, color=colors)
+class BarPanel(Panel):
+    title = "Sunspot Maximum Areas vs Time (Solar Cycle {label})"
+
+    def __init__(self, fig, ax, params):
+        super().__init__(fig, ax, params)
+        ax.set_xlabel("Days since start of cycle", fontsize=12)
+        ax.set_ylabel("Sunspot Area (µHem)", fontsize=12)
 
-    ax_bar.set_xlabel("Days since start of cycle", fontsize=12)
-    ax_bar.set_ylabel("Sunspot Area (µHem)", fontsize=12)
-    ax_bar.set_title(f"Sunspot Maximum Areas vs Time (Solar Cycle {start_year}-{end_year})", fontsize=16)
+    def draw_data(self, c):
+        sun_cycle_df = c["sun_cycle_df"]
+        self.add(self.ax.bar(sun_cycle_df["days_since_start"], sun_cycle_df["area"],
+                             width=20, alpha=0.6, color=c["colors"]))
+        self.ax.autoscale()
 
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    cbar = fig_bar.colorbar(sm, ax=ax_bar)
-    cbar.set_label('Sunspot Area (µHem)', fontsize=12)
 
-    bar_path = os.path.join(bar_folder, f"bar_cycle_{start_year}-{end_year}.png")
-    plt.savefig(bar_path, dpi=300)
-    plt.close(fig_bar)
+class CycleFigure:
+    """A figure of stacked panels kept open between cycles; render() redraws only the data."""
 
+    def __init__(self, panels, figsize, params, **subplot_kw):
+        self.fig, axes = plt.subplots(len(panels), 1, figsize=figsize, squeeze=False, **subplot_kw)
+        self.panels = [panel(self.fig, ax, params) for panel, ax in zip(panels, axes[:, 0])]
+        # Constrained layout starts from (and overwrites) the current positions
+        self.positions = [(ax, ax.get_position()) for ax in self.fig.axes]
+
+    def render(self, c, path, dpi=300):
+        # Lay out every cycle from the freshly built figure, not from the previous cycle's result
+        for ax, position in self.positions:
+            ax._set_position(position)
+        for panel in self.panels:
+            panel.draw(c)
+        return save_figure(self.fig, path, dpi, close=False)
+
+    def close(self):
+        plt.close(self.fig)
+
+
+# figure type -> (template factory, folder, file name pattern)
+FIGURES = {
+    # --- FIGURE 1: Butterfly Diagram ---
+    "butterfly": (lambda params: CycleFigure([ButterflyPanel], (14, 10), params),
+                  butterfly_folder, "butterfly_cycle_{}-{}.png"),
+    # --- FIGURE 2: Regression ---
+    "regression": (lambda params: CycleFigure([RegressionPanel], (10, 6), params),
+                   regression_folder, "regression_cycle_{}-{}.png"),
+    # --- FIGURE 3: Bar Plot ---
+    "bar": (lambda params: CycleFigure([BarPanel], (14, 10), params),
+            bar_folder, "bar_cycle_{}-{}.png"),
     # --- INTEGRATED FIGURE ---
-    fig_integrated, axes = plt.subplots(3, 1, figsize=(14, 20), constrained_layout=True)
+    "integrated": (lambda params: CycleFigure([ButterflyPanel, RegressionPanel, BarPanel], (14, 20), params,
+                                              constrained_layout=True),
+                   integrated_folder, "solar_cycle_{}-{}.png"),
+}
 
-    axes[0].scatter(x_butterfly, lat_butterfly,
-                    s=np.array(area_butterfly) / 50,
-                    color="lightblue", alpha=0.5, label="All Spots")
-    for idx in topN.index:
-        spot = topN.loc[idx]
-        axes[0].scatter(
-            spot["date"].year + spot["date"].month / 12 + spot["date"].day / 365,
-            spot["latitude"],
-            s=spot["area"] / 40,
-            color=color_map[idx],
-            edgecolor="black",
-            alpha=0.9,
-            label=f"Group{spot['group_id']} ({spot['date'].date()})"
-        )
-    axes[0].set_title(f"Butterfly Diagram (Solar Cycle {start_year}-{end_year})", fontsize=16)
-    axes[0].set_xlabel("Year (fractional)", fontsize=12)
-    axes[0].set_ylabel("Latitude", fontsize=12)
-    axes[0].legend(fontsize=8)
-
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    fig_integrated.colorbar(sm, ax=axes[0], label="Sunspot Area (µHem)")
 
-    if not sun_df.empty:
-        axes[1].scatter(sun_df["area"], sun_df["duration"], s=10, alpha=0.5, color="lightblue", label="Sunspots")
-        for idx in topN.index:
-            match = sun_df[sun_df["area"] == topN.loc[idx]["area"]]
-            if not match.empty:
-                axes[1].scatter(match["area"], match["duration"], s=50,
-                                color=color_map[idx], edgecolor="black",
-                                label=f"Group{topN.loc[idx]['group_id']} ({topN.loc[idx]['date'].date()})")
-        axes[1].plot(x_fit, y_fit, color="red", linewidth=2, label=equation_text)
-        axes[1].set_ylim(0, 100)
-        axes[1].set_xlabel("Max Area (µHem)", fontsize=12)
-        axes[1].set_ylabel("Duration (days)", fontsize=12)
-    axes[1].set_title(f"Sunspot Area vs Duration (Solar Cycle {start_year}-{end_year})", fontsize=16)
-    axes[1].legend(fontsize=8)
-
-    fig_integrated.colorbar(sm, ax=axes[1], label="Sunspot Area (µHem)")
-
-    axes[2].bar(sun_cycle_df["days_since_start"], sun_cycle_df["area"],
-                width=20, alpha=0.6, color=colors)
-    axes[2].set_xlabel("Days since start of cycle", fontsize=12)
-    axes[2].set_ylabel("Sunspot Area (µHem)", fontsize=12)
-    axes[2].set_title(f"Sunspot Maximum Areas vs Time (Solar Cycle {start_year}-{end_year})", fontsize=16)
-
-    fig_integrated.colorbar(sm, ax=axes[2], label="Sunspot Area (µHem)")
-
-    integrated_path = os.path.join(integrated_folder, f"solar_cycle_{start_year}-{end_year}.png")
-    plt.savefig(integrated_path, dpi=300)
-    plt.close(fig_integrated)
-
-    print(f"Saved figures for cycle {start_year}-{end_year}")
+def figure_path(kind, cycle_start, cycle_end, out_dir="analysis"):
+    _, folder, pattern = FIGURES[kind]
+    return os.path.join(out_dir, folder, pattern.format(cycle_start.year, cycle_end.year))
+
+
+# Per-process state: the catalog is memory-mapped from the columnar cache, so
+# every worker shares the same pages instead of receiving a pickled copy.
+_worker = {}
+
+
+def _init_worker(csv_path, params, df=None, lifecycle=None, max_gap_days=MAX_GAP_DAYS):
+    _worker["df"] = load_gpr(csv_path) if df is None else df
+    _worker["lifecycle"] = load_lifecycle(csv_path, max_gap_days=max_gap_days) if lifecycle is None else lifecycle
+    _worker["params"] = params
+    _worker["cycles"] = {}
+    _close_templates()
+
+
+def _close_templates():
+    for template in _worker.get("templates", {}).values():
+        template.close()
+    _worker["templates"] = {}
+
+
+def _init_pool_worker(csv_path, params, variants, max_gap_days):
+    use_headless()
+    configure_output(variants)
+    # Same cache entries as the parent: the catalog and the lifecycle built with its max_gap_days
+    _init_worker(csv_path, params, max_gap_days=max_gap_days)
+
+
+def _template(kind):
+    templates = _worker["templates"]
+    if kind not in templates:
+        templates[kind] = FIGURES[kind][0](_worker["params"])
+    return templates[kind]
+
+
+def _cycle_data(cycle_start, cycle_end):
+    cycles = _worker["cycles"]
+    if (cycle_start, cycle_end) not in cycles:
+        cycles[(cycle_start, cycle_end)] = prepare_cycle(
+            _worker["df"], _worker["lifecycle"], cycle_start, cycle_end, _worker["params"])
+    return cycles[(cycle_start, cycle_end)]
+
+
+def render_job(job):
+    """Render one (cycle, figure type) job; returns {variant: output} or None."""
+    cycle_start, cycle_end, kind, dpi, path = job
+    c = _cycle_data(cycle_start, cycle_end)
+    if c is None:
+        return None
+    return _template(kind).render(c, path, dpi)
+
+
+def run(csv_path=CSV_PATH, cycles=None, kinds=tuple(FIGURES), workers=1, dpi=300,
+        params=PLOT_PARAMS, force=False, out_dir="analysis", df=None, lifecycle=None, max_gap_days=MAX_GAP_DAYS):
+    """Render the per-cycle figures; `df`/`lifecycle` can be passed in to reuse an already loaded catalog.
+
+    Pool workers load the catalog and lifecycle from the cache (built with `max_gap_days`),
+    so a run given in-memory data renders serially instead: the workers couldn't see it.
+    """
+    use_headless()
+    if workers > 1 and (df is not None or lifecycle is not None):
+        print("In-memory catalog passed in: rendering serially")
+        workers = 1
+    for kind in kinds:
+        os.makedirs(os.path.join(out_dir, FIGURES[kind][1]), exist_ok=True)
+
+    # Skip figures whose cycle data and plotting parameters are unchanged since the last build
+    manifest = BuildManifest(os.path.join(out_dir, ".build_manifest.json"))
+    if df is None:
+        df = load_gpr(csv_path)
+    if lifecycle is None:
+        lifecycle = load_lifecycle(csv_path, max_gap_days=max_gap_days)
+    jobs, keys = [], {}
+    if cycles is None:
+        cycles = detect_cycles(df)
+    for cycle_start, cycle_end in cycles:
+        data_hash = cycle_input_hash(df, lifecycle, cycle_start, cycle_end)
+        # Cycle-major order keeps a worker's cached cycle data hot across figure types
+        for kind in kinds:
+            path = figure_path(kind, cycle_start, cycle_end, out_dir)
+            keys[path] = hash_inputs(data_hash, params, kind, dpi, output_variants(), RENDER_VERSION)
+            files = [variant_path(path, variant) for variant in output_variants()]
+            if not force and manifest.is_current(path, keys[path], files):
+                print(f"Up to date: {path}")
+                continue
+            jobs.append((cycle_start, cycle_end, kind, dpi, path))
+
+    if workers <= 1:
+        _init_worker(csv_path, params, df, lifecycle)
+        results = map(render_job, jobs)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker,
+                                       initargs=(csv_path, params, output_variants(), max_gap_days))
+        results = executor.map(render_job, jobs)
+
+    written = {}
+    try:
+        for job, outputs in zip(jobs, results):
+            if outputs is not None:
+                path = job[4]
+                manifest.record(path, keys[path])
+                written[path] = outputs
+                print(f"Saved {job[2]} figure for cycle {cycle_label(job[0], job[1])} -> {path}")
+    finally:
+        # Keep whatever finished, so an interrupted run resumes where it stopped
+        manifest.save()
+        write_index(os.path.join(out_dir, "figures.json"), written)
+        if workers > 1:
+            executor.shutdown()
+        else:
+            _close_templates()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-cycle butterfly, regression and bar plots")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="render processes (1 = serial)")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--force", action="store_true", help="re-render even if inputs are unchanged")
+    parser.add_argument("--raster", action="store_true", help="binned butterfly panels for very large catalogs")
+    parser.add_argument("--formats", default="png",
+                        help="comma-separated figure variants: png, webp, thumb, svg")
+    args = parser.parse_args()
+    configure_output(args.formats.split(","))
+    run(args.csv, workers=args.workers, dpi=args.dpi, force=args.force,
+        params=dict(PLOT_PARAMS, raster=args.raster))
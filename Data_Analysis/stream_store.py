@@ -0,0 +1,164 @@
+"""Chunked ingestion of large sunspot catalogs into a year-partitioned .npy store.
+
+Catalogs such as the Debrecen DPD or USET-derived tables don't fit in memory at
+full per-spot resolution, so they are read in chunks, normalised to the GPR
+column names and written as one part per (chunk, year). Aggregations then run
+part by part, keeping peak memory at roughly one chunk plus the results.
+"""
+import glob
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from butterfly_raster import butterfly_histogram
+from gpr_loader import DATE_PARTS, _column_array, _read_meta, _write_meta, file_digest
+from lifecycle import (MAX_GAP_DAYS, combine_daily, combine_lifecycle, daily_group_area, disk_passages,
+                       finalize_lifecycle, partial_lifecycle)
+
+STORE_VERSION = 1
+
+# Lower-cased source column -> GPR column name
+COLUMN_ALIASES = {
+    "yr": "year", "mon": "month", "dy": "day", "hr": "hour", "min": "minute", "mn": "minute", "sec": "second",
+    "lat": "latitude", "b": "latitude",
+    "lon": "longitude", "l": "longitude", "carrington_longitude": "longitude", "carrlon": "longitude",
+    "umbarea": "umbra_area", "umbra": "umbra_area",
+    "wholespotarea": "area", "whole_spot_area": "area", "corrected_area": "area", "area_corrected": "area",
+    "noaa": "group_id", "group": "group_id", "groupid": "group_id", "group_number": "group_id",
+}
+
+
+def normalize_chunk(chunk, aliases=COLUMN_ALIASES):
+    """Rename to GPR column names, add `date` and narrow dtypes like the GPR cache does."""
+    names = [str(c).strip().lower() for c in chunk.columns]
+    chunk = chunk.set_axis([aliases.get(n, n) for n in names], axis=1)
+    for part in DATE_PARTS[3:]:
+        if part not in chunk:
+            chunk[part] = 0
+    chunk["date"] = pd.to_datetime(chunk[DATE_PARTS])
+    return pd.DataFrame({name: _column_array(chunk, name) for name in chunk.columns}, copy=False)
+
+
+def ingest_csv(csv_path, store_dir, chunksize=500_000, aliases=COLUMN_ALIASES, rebuild=False):
+    """Stream a catalog CSV into `store_dir/year=YYYY/part-NNNNN/<column>.npy`; skipped if already ingested."""
+    digest = file_digest(csv_path)
+    meta = None if rebuild else _read_meta(store_dir)
+    if meta is not None and meta.get("sha256") == digest and meta.get("version") == STORE_VERSION:
+        return meta
+
+    # Written next to the store and swapped in at the end: an interrupted ingest leaves
+    # the old store untouched, and parts of the old layout never mix with the new one
+    build_dir = store_dir.rstrip(os.sep) + ".ingest"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(build_dir)
+
+    rows, columns, years = 0, None, set()
+    for n, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize)):
+        chunk = normalize_chunk(chunk, aliases)
+        chunk = chunk.sort_values("date", kind="stable", ignore_index=True)
+        columns = list(chunk.columns)
+        for year, part in chunk.groupby(chunk["date"].dt.year, sort=True):
+            folder = os.path.join(build_dir, f"year={year}", f"part-{n:05d}")
+            os.makedirs(folder, exist_ok=True)
+            for name in columns:
+                np.save(os.path.join(folder, f"{name}.npy"), part[name].to_numpy())
+            years.add(int(year))
+        rows += len(chunk)
+
+    meta = {
+        "version": STORE_VERSION,
+        "source": os.path.abspath(csv_path),
+        "sha256": digest,
+        "rows": rows,
+        "columns": columns,
+        "years": sorted(years),
+    }
+    _write_meta(build_dir, meta)
+    old_dir = store_dir.rstrip(os.sep) + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(build_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return meta
+
+
+def iter_store(store_dir, columns=None, years=None):
+    """Yield memory-mapped DataFrames part by part, in year (then chunk) order."""
+    meta = _read_meta(store_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No ingested catalog in {store_dir}; run ingest_csv first")
+    names = meta["columns"] if columns is None else list(columns)
+    for year in meta["years"]:
+        if years is not None and year not in years:
+            continue
+        for folder in sorted(glob.glob(os.path.join(store_dir, f"year={year}", "part-*"))):
+            yield pd.DataFrame({name: np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+                                for name in names}, copy=False)
+
+
+def _retire(partial, daily, before, max_gap_days):
+    """Split off the groups last seen before `before`: (their partial rows and passages, the rest)."""
+    done = partial.index[partial["last_seen"] < before]
+    if not len(done):
+        return None, None, partial, daily
+    in_done = daily["group_id"].isin(done).to_numpy()
+    return (partial.loc[done], disk_passages(daily[in_done], max_gap_days),
+            partial.drop(done), daily[~in_done].reset_index(drop=True))
+
+
+def stream_lifecycle(parts, max_gap_days=MAX_GAP_DAYS):
+    """Group lifecycle table built block by block, with bounded working memory.
+
+    Blocks must come in year order, as iter_store yields them (rows inside a year may
+    be in any order). Each block is folded into running per-group partials and daily
+    areas. When a new year starts, groups unseen for more than `max_gap_days` before it
+    are settled: any later sighting starts a new disk passage, so only their partial row
+    and passages are kept, not their daily series. Working memory is therefore about
+    one year of groups; the output still has one row per group.
+    """
+    partial = daily = None
+    done_partials, done_passages = [], []
+    year_start = None
+    for part in parts:
+        if part.empty:
+            continue
+        first = part["date"].min().to_datetime64().astype("datetime64[Y]")
+        if year_start is not None and first < year_start:
+            raise ValueError(f"blocks must come in year order: got {first} after {year_start}")
+        if partial is not None and first > year_start:
+            cutoff = first - np.timedelta64(max_gap_days, "D")
+            done, passages, partial, daily = _retire(partial, daily, cutoff, max_gap_days)
+            if done is not None:
+                done_partials.append(done)
+                done_passages.append(passages)
+        year_start = first
+        block_partial, block_daily = partial_lifecycle(part), daily_group_area(part)
+        partial = block_partial if partial is None else combine_lifecycle(partial, block_partial)
+        daily = block_daily if daily is None else combine_daily(daily, block_daily)
+    if partial is None:
+        raise ValueError("no observations in the stream")
+    if len(partial):
+        done_partials.append(partial)
+        done_passages.append(disk_passages(daily, max_gap_days))
+    # A group can be settled more than once (it came back); its pieces merge like blocks
+    return finalize_lifecycle(combine_lifecycle(*done_partials), pd.concat(done_passages, ignore_index=True))
+
+
+def stream_butterfly_bins(parts, time_edges, lat_edges, min_area=0):
+    """(area-weighted, count) time × latitude histograms accumulated over catalog blocks.
+
+    `time_edges` are datetime64 values; blocks are binned independently so only
+    the two output grids stay in memory.
+    """
+    area_grid = np.zeros((len(time_edges) - 1, len(lat_edges) - 1))
+    count_grid = np.zeros(area_grid.shape, dtype=np.int64)
+    for part in parts:
+        part = part[part["area"] >= min_area]
+        area, count = butterfly_histogram(part["date"].to_numpy(), part["latitude"].to_numpy(),
+                                          part["area"].to_numpy(), time_edges, lat_edges)
+        area_grid += area
+        count_grid += count
+    return area_grid, count_grid
@@ -0,0 +1,177 @@
+"""Sunspot density and per-cycle top spots projected onto a sphere, exported as glTF for the web simulation.
+
+Geometry follows the simulation's convention (components/Simulation.tsx):
+x = cos(lat)·cos(lon), y = sin(lat), z = cos(lat)·sin(lon), on a sphere of radius 1,
+so the .gltf can be loaded with useGLTF and scaled to the sun's radius.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from cycles import cycle_label, detect_cycles
+from density_cube import load_density_cube, marginal
+from gpr_loader import DEFAULT_CSV, load_gpr, window_bounds
+
+# glTF constants
+FLOAT, UNSIGNED_INT = 5126, 5125
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+POINTS, TRIANGLES = 0, 4
+TYPES = {1: "SCALAR", 3: "VEC3", 4: "VEC4"}
+
+
+def to_cartesian(lat, lon, radius=1.0):
+    """(n, 3) float32 positions for latitude/longitude in degrees."""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    xyz = np.stack([cos_lat * np.cos(lon), np.sin(lat), cos_lat * np.sin(lon)], axis=-1)
+    return (np.asarray(radius, dtype=np.float64)[..., None] * xyz).astype(np.float32)
+
+
+def density_shell(grid, lat_edges, lon_edges, radius=1.002):
+    """Triangle mesh with one vertex per (latitude, longitude) bin centre, wrapping around in longitude.
+
+    Returns (positions, intensity scaled to 0-1, uint32 triangle indices).
+    """
+    lat_c = (np.asarray(lat_edges[:-1]) + np.asarray(lat_edges[1:])) / 2
+    lon_c = (np.asarray(lon_edges[:-1]) + np.asarray(lon_edges[1:])) / 2
+    n_lat, n_lon = len(lat_c), len(lon_c)
+    lat, lon = np.meshgrid(lat_c, lon_c, indexing="ij")
+    positions = to_cartesian(lat.ravel(), lon.ravel(), radius)
+    peak = grid.max()
+    intensity = (grid.ravel() / peak if peak > 0 else np.zeros(grid.size)).astype(np.float32)
+
+    # Two triangles per cell between neighbouring rows; the last column joins the first
+    i, j = np.meshgrid(np.arange(n_lat - 1), np.arange(n_lon), indexing="ij")
+    a = i * n_lon + j
+    b = i * n_lon + (j + 1) % n_lon
+    c, d = a + n_lon, b + n_lon
+    faces = np.stack([a, c, b, b, c, d], axis=-1).reshape(-1, 3)
+    return positions, intensity, faces.astype(np.uint32).ravel()
+
+
+def top_spot_points(df, cycles, top_n=10, min_area=50, radius=1.004):
+    """Positions, 0-1 intensity (area) and cycle index of the top-N spots of every cycle."""
+    df = df[df["area"] >= min_area]
+    starts, ends = window_bounds(df, [s for s, _ in cycles], [e for _, e in cycles])
+    rows, cycle_index = [], []
+    for k, (i, j) in enumerate(zip(starts, ends)):
+        top = df.iloc[i:j].nlargest(top_n, "area")
+        rows.append(top)
+        cycle_index.append(np.full(len(top), k, dtype=np.float32))
+    lat = np.concatenate([r["latitude"].to_numpy() for r in rows])
+    lon = np.concatenate([r["longitude"].to_numpy() for r in rows])
+    area = np.concatenate([r["area"].to_numpy(dtype=np.float64) for r in rows])
+    intensity = (area / area.max()).astype(np.float32) if len(area) else area.astype(np.float32)
+    return to_cartesian(lat, lon, radius), intensity, np.concatenate(cycle_index)
+
+
+def colorize(intensity, cmap="inferno"):
+    """RGBA float32 vertex colours; alpha follows intensity so empty bins vanish."""
+    from matplotlib import colormaps
+
+    rgba = colormaps[cmap](intensity).astype(np.float32)
+    rgba[:, 3] = intensity
+    return rgba
+
+
+class _Buffer:
+    """Binary chunk plus the bufferViews/accessors describing it."""
+
+    def __init__(self):
+        self.chunks, self.views, self.accessors, self.length = [], [], [], 0
+
+    def add(self, array, target=None, minmax=False):
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target:
+            view["target"] = target
+        self.views.append(view)
+        pad = -len(data) % 4
+        self.chunks.append(data + b"\0" * pad)
+        self.length += len(data) + pad
+
+        width = 1 if array.ndim == 1 else array.shape[1]
+        accessor = {
+            "bufferView": len(self.views) - 1,
+            "componentType": UNSIGNED_INT if array.dtype == np.uint32 else FLOAT,
+            "count": len(array),
+            "type": TYPES[width],
+        }
+        if minmax:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+def export_gltf(path, meshes, extras=None):
+    """Write `path` (.gltf JSON) and its .bin; each mesh is a dict of name, positions, colors,
+    intensity, optional uint32 indices and mode (TRIANGLES or POINTS)."""
+    buffer = _Buffer()
+    gltf_meshes, nodes = [], []
+    for mesh in meshes:
+        attributes = {
+            "POSITION": buffer.add(mesh["positions"], ARRAY_BUFFER, minmax=True),
+            "COLOR_0": buffer.add(mesh["colors"], ARRAY_BUFFER),
+            # Raw values for shaders that want their own colour ramp
+            "_INTENSITY": buffer.add(mesh["intensity"], ARRAY_BUFFER),
+        }
+        for name, values in mesh.get("attributes", {}).items():
+            attributes[name] = buffer.add(values, ARRAY_BUFFER)
+        primitive = {"attributes": attributes, "mode": mesh.get("mode", TRIANGLES)}
+        if mesh.get("indices") is not None:
+            primitive["indices"] = buffer.add(mesh["indices"], ELEMENT_ARRAY_BUFFER)
+        nodes.append({"name": mesh["name"], "mesh": len(gltf_meshes)})
+        gltf_meshes.append({"name": mesh["name"], "primitives": [primitive]})
+
+    bin_name = os.path.splitext(os.path.basename(path))[0] + ".bin"
+    with open(os.path.join(os.path.dirname(path) or ".", bin_name), "wb") as f:
+        f.write(b"".join(buffer.chunks))
+    gltf = {
+        "asset": {"version": "2.0", "generator": "ProjectArun sun_hotspots.py"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes,
+        "meshes": gltf_meshes,
+        "buffers": [{"uri": bin_name, "byteLength": buffer.length}],
+        "bufferViews": buffer.views,
+        "accessors": buffer.accessors,
+    }
+    if extras:
+        gltf["extras"] = extras
+    with open(path, "w") as f:
+        json.dump(gltf, f)
+    return path
+
+
+def export_hotspots(df, csv_path=DEFAULT_CSV, out_path="analysis/sun_hotspots.gltf", top_n=10, min_area=50,
+                    cmap="inferno"):
+    """Density shell (all cycles) plus top-N spots per cycle in one .gltf/.bin pair."""
+    cube, info = load_density_cube(csv_path, min_area=min_area)
+    grid = marginal(cube, info, ("latitude", "longitude"))
+    positions, intensity, faces = density_shell(grid, info["edges"]["latitude"], info["edges"]["longitude"])
+
+    cycles = detect_cycles(df)
+    spot_positions, spot_intensity, spot_cycle = top_spot_points(df, cycles, top_n, min_area)
+    meshes = [
+        {"name": "density", "positions": positions, "colors": colorize(intensity, cmap),
+         "intensity": intensity, "indices": faces, "mode": TRIANGLES},
+        {"name": "top_spots", "positions": spot_positions, "colors": colorize(spot_intensity, cmap),
+         "intensity": spot_intensity, "attributes": {"_CYCLE": spot_cycle}, "mode": POINTS},
+    ]
+    extras = {"cycles": [cycle_label(start, end) for start, end in cycles], "top_n": top_n, "min_area": min_area}
+    return export_gltf(out_path, meshes, extras)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export sunspot hotspots as glTF for the web simulation")
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--out", default="analysis/sun_hotspots.gltf")
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    print(export_hotspots(load_gpr(args.csv), args.csv, args.out, top_n=args.top_n))
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def decimal_year(dates):
+    """datetime64 values -> fractional year, using the real length of each year.
+
+    1 Jan 00:00 maps to the integer year, and the fraction grows with elapsed
+    time so leap years and day-of-year are taken into account.
+    """
+    d = np.asarray(dates, dtype="datetime64[s]")
+    years = d.astype("datetime64[Y]")
+    year_start = years.astype("datetime64[s]")
+    year_length = (years + 1).astype("datetime64[s]") - year_start
+    return 1970 + years.astype(np.int64) + (d - year_start) / year_length
+
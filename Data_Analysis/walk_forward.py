@@ -0,0 +1,106 @@
+"""Cycle-wise walk-forward evaluation of longitude models.
+
+Fold k trains on solar cycles 0..k-1 and tests on cycle k, so no model ever sees
+the future it is scored on. Features are re-standardized on each fold's training
+rows. Folds are independent and run in a process pool; each worker opens the
+memory-mapped feature store once and has its BLAS / TensorFlow thread pools
+pinned, so `workers × threads` never oversubscribes the machine.
+
+A model is any picklable function fit_predict(X_train, y_train, X_test, **params)
+returning (n_test, 2) predictions of (sin, cos) of longitude, e.g.
+long_prediction.fit_predict. Models that want the features in their own units
+(baselines.py) are run with standardize=False.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from circular import angular_error, decode_longitude, error_summary
+from cycles import cycle_phase
+from feature_store import load_features
+
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS")
+
+# Per-process state: the feature store, opened once per worker
+_worker = {}
+
+
+def pin_threads(threads):
+    """Limit this process's native thread pools (BLAS, OpenMP, TensorFlow) to `threads`."""
+    for name in THREAD_VARIABLES:
+        os.environ[name] = str(threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = "1"
+    try:
+        # Pools that already started (NumPy's BLAS) ignore the variables above
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    threadpool_limits(threads)
+
+
+def _init_fold_worker(csv_path, threads):
+    pin_threads(threads)
+    _worker["store"] = load_features(csv_path)
+
+
+def top_groups_per_cycle(lifecycle, cycles, top_n=20):
+    """Ids of the `top_n` groups with the largest peak area in every cycle."""
+    _, k = cycle_phase(lifecycle["peak_date"].to_numpy(), cycles)
+    ranked = lifecycle.assign(cycle=k)[k >= 0].sort_values("peak_area", ascending=False)
+    return ranked.groupby("cycle").head(top_n)["group_id"].to_numpy()
+
+
+def walk_forward_folds(cycle, min_train_cycles=1):
+    """(test cycle, train rows, test rows) for every cycle after the first `min_train_cycles`."""
+    cycle = np.asarray(cycle)
+    for k in range(min_train_cycles, int(cycle.max()) + 1):
+        test = np.flatnonzero(cycle == k)
+        if len(test):
+            yield k, np.flatnonzero((cycle >= 0) & (cycle < k)), test
+
+
+def run_fold(job):
+    """Fit on one fold's training rows and return its angular errors on the test rows."""
+    k, train, test, fit_predict, params, standardize = job
+    store = _worker["store"]
+    raw_train = store.inverse_transform(store["X"][train])
+    raw_test = store.inverse_transform(store["X"][test])
+    if standardize:
+        mean, scale = raw_train.mean(axis=0), raw_train.std(axis=0)
+        scale[scale == 0] = 1.0
+        raw_train = ((raw_train - mean) / scale).astype(np.float32)
+        raw_test = ((raw_test - mean) / scale).astype(np.float32)
+    pred = fit_predict(raw_train, np.asarray(store["y"][train]), raw_test, **params)
+    return k, len(train), angular_error(store["longitude"][test], decode_longitude(pred))
+
+
+def walk_forward(fit_predict, csv_path, params=None, groups=None, min_train_cycles=1, workers=1, threads=1,
+                 standardize=True):
+    """Per-fold circular-error table (one row per test cycle) plus an "all" row pooling every test row.
+
+    `groups` restricts the rows to those group ids (e.g. top_groups_per_cycle).
+    With standardize=False the model gets raw features (degrees, days, µHem, days).
+    """
+    store = load_features(csv_path)
+    rows = np.arange(len(store)) if groups is None else np.flatnonzero(np.isin(store["group_id"], groups))
+    jobs = [(k, rows[train], rows[test], fit_predict, params or {}, standardize)
+            for k, train, test in walk_forward_folds(store["cycle"][rows], min_train_cycles)]
+    if not jobs:
+        raise ValueError("walk-forward needs rows in at least two cycles")
+
+    if workers <= 1:
+        # Serial runs keep the caller's thread settings; `threads` only applies to pool workers
+        _worker["store"] = store
+        results = list(map(run_fold, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_fold_worker,
+                                 initargs=(csv_path, threads)) as executor:
+            results = list(executor.map(run_fold, jobs))
+
+    labels = store.info["cycles"]
+    table = pd.DataFrame([dict(cycle=labels[k], n_train=n_train, **error_summary(errors))
+                          for k, n_train, errors in results])
+    pooled = dict(cycle="all", n_train=np.nan, **error_summary(np.concatenate([e for _, _, e in results])))
+    return pd.concat([table, pd.DataFrame([pooled])], ignore_index=True).astype({"n_train": "Int64"})